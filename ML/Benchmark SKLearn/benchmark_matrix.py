@@ -0,0 +1,177 @@
+"""
+Declarative estimator matrix for the prediction benchmark.
+
+Instead of the single hard-coded `DecisionTreeClassifier` in
+`benchmark_sklearn_prediction.py`, a JSON config lists estimators, hyperparameter grids and
+training-set sizes. `run_matrix` expands the cross-product, fits every combination, measures
+atomic and bulk prediction latency and returns a latency-versus-model-complexity table, so
+the serving cost of each extra tree level or ensemble member can be read off directly.
+
+Config format (see `benchmark_matrix.json`):
+
+    {
+        "dataset": {"source": "train_csv", "n_train": [10000, 100000]},
+        "atomic_sample_size": 1000,
+        "estimators": [
+            {
+                "name": "DecisionTreeClassifier",
+                "class": "sklearn.tree.DecisionTreeClassifier",
+                "params": {"random_state": 42},
+                "grid": {"max_depth": [2, 4, 8, 16, null]},
+                "complexity": "tree"
+            }
+        ]
+    }
+
+`complexity` names one of `COMPLEXITY_COMPUTERS`.
+
+Usage:
+
+    python "ML/Benchmark SKLearn/benchmark_matrix.py" [config.json] [--output table.csv]
+"""
+import argparse
+import importlib
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from benchmark_sklearn_prediction import benchmark_estimator, make_synthetic_data
+from feature_pipeline import load_features
+from latency_histogram import LatencyHistogram
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_matrix.json')
+
+
+def _tree_complexity(clf):
+    return {"max_depth": clf.tree_.max_depth, "node_count": clf.tree_.node_count}
+
+
+def _forest_complexity(clf):
+    return {
+        "n_estimators": len(clf.estimators_),
+        "max_depth": max(tree.tree_.max_depth for tree in clf.estimators_),
+        "node_count": sum(tree.tree_.node_count for tree in clf.estimators_),
+    }
+
+
+def _linear_complexity(clf):
+    return {"nonzero_coefs": int(np.count_nonzero(clf.coef_))}
+
+
+def _svm_complexity(clf):
+    return {"n_support_vectors": int(np.sum(clf.n_support_))}
+
+
+COMPLEXITY_COMPUTERS = {
+    "tree": _tree_complexity,
+    "forest": _forest_complexity,
+    "linear": _linear_complexity,
+    "svm": _svm_complexity,
+}
+
+
+def load_config(path=DEFAULT_CONFIG_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _estimator_class(dotted_path):
+    module_name, class_name = dotted_path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def expand_grid(estimator_spec):
+    """Yield one parameter dict per point of the estimator's grid, merged over its fixed params."""
+    grid = estimator_spec.get("grid", {})
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        yield {**estimator_spec.get("params", {}), **dict(zip(names, values))}
+
+
+def load_dataset(dataset_spec):
+    """
+    Return X_train, X_test, y_train, y_test for the `dataset` section of the config.
+
+    `"source": "train_csv"` uses the Kaggle features; `"source": "synthetic"` generates
+    data with `make_synthetic_data`, configured by the optional keys `n_samples`,
+    `n_features`, `informative_ratio` and `task`.
+    """
+    source = dataset_spec.get("source", "train_csv")
+    if source == "train_csv":
+        X, y = load_features()
+    elif source == "synthetic":
+        X, y = make_synthetic_data(
+            dataset_spec.get("n_samples", 100000),
+            dataset_spec.get("n_features", 11),
+            dataset_spec.get("informative_ratio", 0.5),
+            dataset_spec.get("task", "classification"),
+        )
+    else:
+        raise ValueError("Unknown dataset source %r" % source)
+    return train_test_split(X, y, test_size=0.2, random_state=42)
+
+
+def run_matrix(config):
+    """
+    Fit and benchmark every (estimator, grid point, training size) combination.
+
+    Returns
+    -------
+    table : `pd.DataFrame` with one row per combination: its parameters, complexity
+    metrics, fit time and atomic p50/p99 and bulk median latencies in microseconds.
+
+    """
+    X_train, X_test, y_train, y_test = load_dataset(config.get("dataset", {}))
+    n_train_sizes = config.get("dataset", {}).get("n_train") or [X_train.shape[0]]
+    atomic_sample_size = config.get("atomic_sample_size", 1000)
+
+    rows = []
+    for estimator_spec in config["estimators"]:
+        estimator_class = _estimator_class(estimator_spec["class"])
+        complexity_computer = COMPLEXITY_COMPUTERS[estimator_spec["complexity"]]
+        for params, n_train in itertools.product(expand_grid(estimator_spec), n_train_sizes):
+            n_train = min(n_train, X_train.shape[0])
+            estimator = estimator_class(**params)
+            print("Benchmarking", estimator, "on", n_train, "rows")
+
+            fit_start = time.perf_counter()
+            estimator.fit(X_train.iloc[:n_train], y_train.iloc[:n_train])
+            fit_time = time.perf_counter() - fit_start
+
+            atomic, bulk = benchmark_estimator(estimator, X_test, sample_size=atomic_sample_size)
+            atomic_histogram = LatencyHistogram.from_samples(atomic)
+            rows.append(
+                {
+                    "estimator": estimator_spec["name"],
+                    "n_train": n_train,
+                    **{"param_%s" % name: value for name, value in params.items()},
+                    **complexity_computer(estimator),
+                    "fit_time_s": fit_time,
+                    "atomic_p50_us": 1e6 * atomic_histogram.percentile(50),
+                    "atomic_p99_us": 1e6 * atomic_histogram.percentile(99),
+                    "bulk_median_us": 1e6 * np.median(bulk),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a declarative prediction benchmark matrix.")
+    parser.add_argument('config', nargs='?', default=DEFAULT_CONFIG_PATH)
+    parser.add_argument('--output', help="also write the table to this CSV file")
+    args = parser.parse_args(argv)
+
+    table = run_matrix(load_config(args.config))
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        print(table)
+    if args.output:
+        table.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
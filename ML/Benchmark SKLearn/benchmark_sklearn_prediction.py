@@ -1,74 +1,139 @@
+import copy
 import gc
-import time
+import os
+import warnings
 from collections import defaultdict
+from contextlib import contextmanager
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
 from sklearn.tree import DecisionTreeClassifier
-from sklearn.datasets import make_regression
+from sklearn.base import clone
+from sklearn.datasets import make_classification, make_regression
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import Ridge, SGDRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.svm import SVR
 from sklearn.utils import shuffle
-from sklearn.preprocessing import LabelEncoder
+
+from cold_start import benchmark_serialization, benchmark_shared_mmap
+from feature_pipeline import DEFAULT_CSV_PATH, file_sha256, load_features
+from fit_scaling import complexity_exponent, extrapolate, fit_scaling
+from latency_histogram import LatencyHistogram, required_samples
+from load_generator import qps_sweep
+from native_threads import available_cpus, native_pools, native_thread_limit, pinned
+from online_encoder import OnlineEncoder, read_raw_records
+from results_store import record_run
+from scaling import throughput_scaling
+from timing import default_engine
+from tree_inference import CompiledTree
 
 
 def _not_in_sphinx():
     # Hack to detect whether we are running by the sphinx builder
     return "__file__" in globals()
 
-def atomic_benchmark_estimator(estimator, X_test, verbose=False, sample_size=1000):
-    """Measure runtime prediction of each instance with an option to sample."""
+# How the test set is handed to `predict()`. The ndarray formats are materialised once,
+# C-contiguous, before timing starts.
+INPUT_FORMATS = {
+    "dataframe": None,
+    "ndarray_float64": np.float64,
+    "ndarray_float32": np.float32,
+}
+
+
+def prepare_input(X, input_format="dataframe"):
+    """Convert the DataFrame `X` to one of the `INPUT_FORMATS`."""
+    dtype = INPUT_FORMATS[input_format]
+    if dtype is None:
+        return X
+    return np.ascontiguousarray(X.to_numpy(dtype=dtype))
+
+
+def _rows(X):
+    """Every single instance of `X` as a one-row 2D input, selected before timing."""
+    if isinstance(X, pd.DataFrame):
+        return [(X.iloc[[i], :],) for i in range(X.shape[0])]
+    # Slices of a C-contiguous array are views: no copy and no allocation per row.
+    return [(X[i : i + 1],) for i in range(X.shape[0])]
+
+
+def _without_feature_names(estimator, input_format):
+    """
+    `estimator` as seen by an ndarray input: a shallow copy without `feature_names_in_`.
+
+    An estimator fitted on a DataFrame checks and warns about the missing feature names
+    on every `predict` of an ndarray; that is not part of the input-conversion cost being
+    measured, so it is kept out of the timed calls.
+    """
+    if INPUT_FORMATS[input_format] is None or not hasattr(estimator, "feature_names_in_"):
+        return estimator
+    estimator = copy.copy(estimator)
+    del estimator.feature_names_in_
+    return estimator
+
+
+@contextmanager
+def _ignore_feature_name_warnings():
+    # Estimators fitted on a DataFrame warn when they get an ndarray without feature names.
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        yield
+
+
+def atomic_benchmark_estimator(estimator, X_test, verbose=False, sample_size=None, engine=None, input_format="dataframe"):
+    """Measure runtime prediction of each instance with an option to sample.
+
+    By default enough instances are sampled for a trustworthy p99.9 (see
+    `latency_histogram.required_samples`), drawing with replacement when the test set
+    is smaller than that.
+    """
+    engine = engine or default_engine()
     
-    # Ensure the sample size doesn't exceed the number of available instances
-    n_instances = min(sample_size, X_test.shape[0])
+    if sample_size is None:
+        sample_size = required_samples(0.999)
+        replace = sample_size > X_test.shape[0]
+        n_instances = sample_size
+    else:
+        # Ensure the sample size doesn't exceed the number of available instances
+        replace = False
+        n_instances = min(sample_size, X_test.shape[0])
     
     # Randomly sample a subset of the test set
-    sampled_X_test = X_test.sample(n=n_instances, random_state=42).reset_index(drop=True)
+    sampled_X_test = X_test.sample(n=n_instances, replace=replace, random_state=42).reset_index(drop=True)
     
-    runtimes = np.zeros(n_instances, dtype=float)
+    # Select every single instance up front so the slicing is not timed
+    instances = _rows(prepare_input(sampled_X_test, input_format))
+    estimator = _without_feature_names(estimator, input_format)
     
-    for i in range(n_instances):
-        instance = sampled_X_test.iloc[[i], :]  # Select a single instance (as DataFrame)
-        
-        start = time.time()
-        estimator.predict(instance)  # Make a prediction
-        runtimes[i] = time.time() - start  # Measure prediction time
+    runtimes = engine.time_each(estimator.predict, instances)  # Measure prediction time
     
     if verbose:
-        print(
-            "atomic_benchmark runtimes:",
-            min(runtimes),
-            np.percentile(runtimes, 50),  # Median runtime
-            max(runtimes),
-        )
+        print("atomic_benchmark runtimes:", LatencyHistogram.from_samples(runtimes).format_summary())
         
     return runtimes
 
 
-def bulk_benchmark_estimator(estimator, X_test, n_bulk_repeats, verbose):
-    """Measure runtime prediction of the whole input."""
+def bulk_benchmark_estimator(estimator, X_test, n_bulk_repeats, verbose, engine=None, input_format="dataframe"):
+    """Measure runtime prediction of the whole input.
+
+    `n_bulk_repeats` is the minimum number of repeats; the timing engine adds more
+    until the median is stable.
+    """
+    engine = engine or default_engine()
     n_instances = X_test.shape[0]
-    runtimes = np.zeros(n_bulk_repeats, dtype=float)
-    for i in range(n_bulk_repeats):
-        start = time.time()
-        estimator.predict(X_test)
-        runtimes[i] = time.time() - start
-    runtimes = np.array(list(map(lambda x: x / float(n_instances), runtimes)))
+    X_test = prepare_input(X_test, input_format)
+    estimator = _without_feature_names(estimator, input_format)
+    runtimes = engine.repeat(estimator.predict, X_test, min_repeats=n_bulk_repeats)
+    runtimes = runtimes / float(n_instances)
     if verbose:
-        print(
-            "bulk_benchmark runtimes:",
-            min(runtimes),
-            np.percentile(runtimes, 50),
-            max(runtimes),
-        )
+        print("bulk_benchmark runtimes:", LatencyHistogram.from_samples(runtimes).format_summary())
     return runtimes
 
-def benchmark_estimator(estimator, X_test, n_bulk_repeats=30, verbose=False):
+def benchmark_estimator(estimator, X_test, n_bulk_repeats=30, verbose=False, engine=None, input_format="dataframe", sample_size=None):
     """
     Measure runtimes of prediction in both atomic and bulk mode.
 
@@ -76,7 +141,10 @@ def benchmark_estimator(estimator, X_test, n_bulk_repeats=30, verbose=False):
     ----------
     estimator : already trained estimator supporting `predict()`
     X_test : test input
-    n_bulk_repeats : how many times to repeat when evaluating bulk mode
+    n_bulk_repeats : minimum number of times to repeat when evaluating bulk mode
+    engine : `timing.TimingEngine` to measure with, defaults to the shared one
+    input_format : one of `INPUT_FORMATS`, how `X_test` is passed to `predict()`
+    sample_size : number of instances timed in atomic mode, adaptive by default
 
     Returns
     -------
@@ -84,10 +152,75 @@ def benchmark_estimator(estimator, X_test, n_bulk_repeats=30, verbose=False):
     runtimes in seconds.
 
     """
-    atomic_runtimes = atomic_benchmark_estimator(estimator, X_test, verbose)
-    bulk_runtimes = bulk_benchmark_estimator(estimator, X_test, n_bulk_repeats, verbose)
+    atomic_runtimes = atomic_benchmark_estimator(estimator, X_test, verbose, sample_size, engine=engine, input_format=input_format)
+    bulk_runtimes = bulk_benchmark_estimator(estimator, X_test, n_bulk_repeats, verbose, engine=engine, input_format=input_format)
     return atomic_runtimes, bulk_runtimes
 
+def geometric_batch_sizes(n_instances):
+    """Batch sizes 1, 2, 4, ... up to and including `n_instances`."""
+    batch_sizes = []
+    batch_size = 1
+    while batch_size < n_instances:
+        batch_sizes.append(batch_size)
+        batch_size *= 2
+    batch_sizes.append(n_instances)
+    return batch_sizes
+
+
+def batch_size_sweep_estimator(estimator, X_test, batch_sizes=None, verbose=False, engine=None):
+    """
+    Measure prediction latency over a geometric range of batch sizes.
+
+    Parameters
+    ----------
+    estimator : already trained estimator supporting `predict()`
+    X_test : test input
+    batch_sizes : batch sizes to measure, defaults to 1, 2, 4, ..., len(X_test)
+    engine : `timing.TimingEngine` to measure with, defaults to the shared one
+
+    Returns
+    -------
+    curve : dict with `np.array`s "batch_sizes", "per_row_latency" (seconds per row,
+    median over repeats) and "throughput" (rows per second), one entry per batch size.
+
+    """
+    engine = engine or default_engine()
+    if batch_sizes is None:
+        batch_sizes = geometric_batch_sizes(X_test.shape[0])
+
+    per_row_latency = np.zeros(len(batch_sizes), dtype=float)
+    for i, batch_size in enumerate(batch_sizes):
+        batch = X_test.iloc[:batch_size]
+        runtimes = engine.repeat(estimator.predict, batch)
+        per_row_latency[i] = np.median(runtimes) / batch_size
+        if verbose:
+            print(
+                "batch_size=%d: %.2f us/row, %.0f rows/sec"
+                % (batch_size, 1e6 * per_row_latency[i], 1.0 / per_row_latency[i])
+            )
+
+    return {
+        "batch_sizes": np.array(batch_sizes),
+        "per_row_latency": per_row_latency,
+        "throughput": 1.0 / per_row_latency,
+    }
+
+
+def find_batching_knee(curve, min_gain=1.1):
+    """
+    Return the batch size after which doubling the batch stops paying off.
+
+    That is the first batch size whose successor improves throughput by less than a
+    factor of `min_gain`.
+    """
+    batch_sizes = curve["batch_sizes"]
+    throughput = curve["throughput"]
+    for i in range(len(batch_sizes) - 1):
+        if throughput[i + 1] < min_gain * throughput[i]:
+            return int(batch_sizes[i])
+    return int(batch_sizes[-1])
+
+
 def boxplot_runtimes(runtimes, pred_type, configuration):
     """
     Plot a new `Figure` with boxplots of prediction runtimes.
@@ -129,8 +262,9 @@ def boxplot_runtimes(runtimes, pred_type, configuration):
 
     plt.show()
 
-def benchmark_throughputs(configuration, duration_secs=0.1):
+def benchmark_throughputs(configuration, duration_secs=0.1, engine=None):
     """benchmark throughput for different estimators."""
+    engine = engine or default_engine()
 
     # Use the already pre-split dataset instead of generating a new one
     X_train = configuration['X_train']
@@ -141,12 +275,9 @@ def benchmark_throughputs(configuration, duration_secs=0.1):
     throughputs = dict()
     for estimator_config in configuration["estimators"]:
         estimator_config["instance"].fit(X_train, y_train)
-        start_time = time.time()
-        n_predictions = 0
-        while (time.time() - start_time) < duration_secs:
-            estimator_config["instance"].predict(X_test.iloc[[0]])
-            n_predictions += 1
-        throughputs[estimator_config["name"]] = n_predictions / duration_secs
+        throughputs[estimator_config["name"]] = engine.throughput(
+            estimator_config["instance"].predict, X_test.iloc[[0]], duration_secs=duration_secs
+        )
     return throughputs
 
 
@@ -177,8 +308,619 @@ def plot_benchmark_throughput(throughputs, configuration):
     )
     plt.show()
 
-def benchmark(configuration):
-    """Run the whole benchmark."""
+def _doubling_counts(maximum):
+    """1, 2, 4, ... up to and including `maximum`."""
+    counts = [1]
+    while counts[-1] * 2 < maximum:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != maximum:
+        counts.append(maximum)
+    return counts
+
+
+def benchmark_throughput_scaling(configuration, max_workers=None, kinds=("thread", "process"), duration_secs=0.5):
+    """
+    Benchmark how single-row prediction throughput scales with the number of workers.
+
+    Every estimator is fitted once and then predicts `X_test.iloc[[0]]` from 1, 2, 4, ...,
+    `max_workers` (defaults to the number of CPUs) concurrent threads and processes.
+
+    Returns
+    -------
+    scaling : dict mapping estimator names to {kind: output of `scaling.throughput_scaling`}
+
+    """
+    X_train = configuration['X_train']
+    y_train = configuration['y_train']
+    X_test = configuration['X_test']
+
+    worker_counts = _doubling_counts(max_workers or os.cpu_count())
+
+    scaling = dict()
+    for estimator_config in configuration["estimators"]:
+        estimator_config["instance"].fit(X_train, y_train)
+        scaling[estimator_config["name"]] = {}
+        for kind in kinds:
+            result = throughput_scaling(
+                estimator_config["instance"], X_test.iloc[[0]], worker_counts, kind, duration_secs
+            )
+            scaling[estimator_config["name"]][kind] = result
+            for n_workers, throughput, efficiency in zip(
+                result["workers"], result["throughput"], result["efficiency"]
+            ):
+                print(
+                    "%s, %d %s worker(s): %.0f predictions/sec, efficiency %.2f"
+                    % (estimator_config["name"], n_workers, kind, throughput, efficiency)
+                )
+    return scaling
+
+
+def plot_throughput_scaling(scaling, configuration):
+    """Plot aggregate throughput and parallel efficiency against the number of workers."""
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    for estimator_conf in configuration["estimators"]:
+        for kind, result in scaling[estimator_conf["name"]].items():
+            label = "%s (%ss)" % (estimator_conf["name"], kind)
+            ax1.plot(result["workers"], result["throughput"], marker="o", label=label)
+            ax2.plot(result["workers"], result["efficiency"], marker="o", label=label)
+
+    ax2.axhline(1.0, color="lightgrey", linestyle="--")
+    for ax in (ax1, ax2):
+        ax.set_xlabel("Workers")
+        ax.grid(True, which="major", color="lightgrey", alpha=0.5)
+        ax.legend()
+    ax1.set_ylabel("Throughput (predictions/sec)")
+    ax2.set_ylabel("Parallel efficiency")
+    fig.suptitle(
+        "Throughput scaling (%d features)" % configuration["n_features"]
+    )
+    plt.show()
+
+
+def benchmark_thread_counts(configuration, thread_counts=None, pin=False, n_bulk_repeats=30):
+    """
+    Benchmark single-row and bulk latency with the native (BLAS/OpenMP) thread pools
+    limited to each of `thread_counts` threads.
+
+    `thread_counts` defaults to 1, 2, 4, ... up to the number of usable cores. With
+    `pin=True` the process is also pinned to the first `n` usable cores while running
+    with `n` threads, which is what each of `cores / n` worker processes would get.
+
+    Returns
+    -------
+    stats : dict mapping estimator names to a list with one dict per setting:
+    {"threads", "cpus" (None when not pinned), "atomic", "bulk"}
+
+    """
+    X_train = configuration['X_train']
+    y_train = configuration['y_train']
+    X_test = configuration['X_test']
+    cpus = available_cpus()
+    thread_counts = thread_counts or _doubling_counts(len(cpus))
+
+    stats = {}
+    for estimator_conf in configuration["estimators"]:
+        estimator = estimator_conf["instance"].fit(X_train, y_train)
+        print("%s native thread pools: %s" % (estimator_conf["name"], native_pools() or "none loaded"))
+        stats[estimator_conf["name"]] = []
+        for n_threads in thread_counts:
+            setting_cpus = cpus[:n_threads] if pin else None
+            gc.collect()
+            with pinned(setting_cpus), native_thread_limit(n_threads):
+                a, b = benchmark_estimator(estimator, X_test, n_bulk_repeats, sample_size=1000)
+            stats[estimator_conf["name"]].append({"threads": n_threads, "cpus": setting_cpus, "atomic": a, "bulk": b})
+            print(
+                "%s, %d thread(s)%s: atomic median %.2f us, p99 %.2f us, bulk median %.3f us/row"
+                % (
+                    estimator_conf["name"],
+                    n_threads,
+                    "" if setting_cpus is None else " pinned to %s" % setting_cpus,
+                    1e6 * np.median(a),
+                    1e6 * np.percentile(a, 99),
+                    1e6 * np.median(b),
+                )
+            )
+    return stats
+
+
+def benchmark_open_loop(configuration, n_workers=None, kind="process", process="poisson", duration_secs=2.0):
+    """
+    Find the request rate each estimator can serve before its latency degrades.
+
+    Every estimator is fitted once and served from a pool of `n_workers` (defaults to
+    the number of CPUs) workers; open-loop requests for `X_test.iloc[[0]]` are offered
+    at increasing rates (see `load_generator.qps_sweep`).
+
+    Returns
+    -------
+    sweeps : dict mapping estimator names to the output of `load_generator.qps_sweep`
+
+    """
+    X_train = configuration['X_train']
+    y_train = configuration['y_train']
+    X_test = configuration['X_test']
+    n_workers = n_workers or os.cpu_count()
+
+    sweeps = {}
+    for estimator_conf in configuration["estimators"]:
+        estimator = estimator_conf["instance"].fit(X_train, y_train)
+        sweep = qps_sweep(estimator, X_test.iloc[[0]], n_workers=n_workers, kind=kind, process=process, duration_secs=duration_secs)
+        sweeps[estimator_conf["name"]] = sweep
+        for result in sweep["results"]:
+            print(
+                "%s, offered %.0f req/s: achieved %.0f req/s, send lag p99 %.0f us%s, %s"
+                % (
+                    estimator_conf["name"],
+                    result["rate"],
+                    result["achieved"],
+                    1e6 * result["send_lag"],
+                    " (generator-limited)" if result["generator_limited"] else "",
+                    result["histogram"].format_summary(),
+                )
+            )
+        if sweep["saturated_at"] is not None:
+            print("%s: saturates at %.0f req/s" % (estimator_conf["name"], sweep["saturated_at"]))
+        elif sweep["generator_limited_at"] is not None:
+            print(
+                "%s: the load generator cannot keep up at %.0f req/s, the estimator's saturation point is unknown"
+                % (estimator_conf["name"], sweep["generator_limited_at"])
+            )
+        else:
+            print("%s: not saturated up to %.0f req/s" % (estimator_conf["name"], sweep["max_sustainable"]))
+    return sweeps
+
+
+def plot_open_loop(sweeps, configuration):
+    """Plot p50 and p99 latency against the offered request rate, marking saturation."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for estimator_conf in configuration["estimators"]:
+        sweep = sweeps[estimator_conf["name"]]
+        # Generator-limited runs measure the sender's backlog, not the estimator
+        results = [result for result in sweep["results"] if not result["generator_limited"]]
+        rates = [result["rate"] for result in results]
+        for percentile, linestyle in ((50, "--"), (99, "-")):
+            latencies = [1e6 * result["histogram"].percentile(percentile) for result in results]
+            ax.plot(rates, latencies, linestyle=linestyle, marker="o", label="%s p%d" % (estimator_conf["name"], percentile))
+        if sweep["saturated_at"] is not None:
+            ax.axvline(sweep["saturated_at"], color="lightgrey", linestyle=":")
+
+    ax.set_yscale("log")
+    ax.set_xlabel("Offered load (requests/sec)")
+    ax.set_ylabel("Latency from intended send time (us)")
+    ax.grid(True, which="major", color="lightgrey", alpha=0.5)
+    ax.legend()
+    ax.set_title("Open-loop latency vs. offered load (%d features)" % configuration["n_features"])
+    plt.show()
+
+
+def benchmark_input_formats(configuration, input_formats=tuple(INPUT_FORMATS)):
+    """
+    Benchmark atomic and bulk prediction for every estimator and every input format.
+
+    The difference between the DataFrame path and the contiguous ndarray paths is the
+    time spent converting and validating the input rather than evaluating the model.
+
+    Returns
+    -------
+    stats : dict mapping estimator names to {input_format: {"atomic": ..., "bulk": ...}}
+
+    """
+    X_train = configuration['X_train']
+    y_train = configuration['y_train']
+    X_test = configuration['X_test']
+
+    stats = {}
+    for estimator_conf in configuration["estimators"]:
+        estimator_conf["instance"].fit(X_train, y_train)
+        gc.collect()
+        stats[estimator_conf["name"]] = {}
+        for input_format in input_formats:
+            a, b = benchmark_estimator(estimator_conf["instance"], X_test, input_format=input_format)
+            stats[estimator_conf["name"]][input_format] = {"atomic": a, "bulk": b}
+
+        fastest = min(np.median(runtimes["atomic"]) for runtimes in stats[estimator_conf["name"]].values())
+        for input_format, runtimes in stats[estimator_conf["name"]].items():
+            median = np.median(runtimes["atomic"])
+            print(
+                "%s, %s: atomic median %.2f us (%.2f us above the fastest format), bulk median %.3f us/row"
+                % (
+                    estimator_conf["name"],
+                    input_format,
+                    1e6 * median,
+                    1e6 * (median - fastest),
+                    1e6 * np.median(runtimes["bulk"]),
+                )
+            )
+    return stats
+
+
+def boxplot_input_formats(stats, pred_type, configuration):
+    """Plot boxplots of prediction runtimes per (estimator, input format) pair."""
+    fig, ax1 = plt.subplots(figsize=(10, 6))
+    labels = []
+    runtimes = []
+    for estimator_conf in configuration["estimators"]:
+        for input_format, format_stats in stats[estimator_conf["name"]].items():
+            labels.append("%s\n%s" % (estimator_conf["name"], input_format))
+            runtimes.append(1e6 * format_stats[pred_type])
+
+    bp = plt.boxplot(runtimes)
+    plt.setp(ax1, xticklabels=labels)
+    plt.setp(bp["boxes"], color="black")
+    plt.setp(bp["whiskers"], color="black")
+    plt.setp(bp["fliers"], color="red", marker="+")
+
+    ax1.yaxis.grid(True, linestyle="-", which="major", color="lightgrey", alpha=0.5)
+    ax1.set_axisbelow(True)
+    ax1.set_title(
+        "Prediction Time per Instance by Input Format - %s, %d feats."
+        % (pred_type.capitalize(), configuration["n_features"])
+    )
+    ax1.set_ylabel("Prediction Time (us)")
+    plt.show()
+
+
+def benchmark_compiled_trees(configuration, input_format="ndarray_float32"):
+    """
+    Compare scikit-learn's `predict` with `tree_inference.CompiledTree` for every
+    `DecisionTreeClassifier` in the configuration, in atomic and bulk mode.
+
+    Returns
+    -------
+    stats : dict mapping estimator names to {"sklearn": ..., "compiled": ...}, each a
+    dict of "atomic" and "bulk" runtimes
+
+    """
+    X_train = configuration['X_train']
+    y_train = configuration['y_train']
+    X_test = configuration['X_test']
+
+    stats = {}
+    for estimator_conf in configuration["estimators"]:
+        if not isinstance(estimator_conf["instance"], DecisionTreeClassifier):
+            continue
+        estimator = estimator_conf["instance"].fit(X_train, y_train)
+        compiled = CompiledTree(estimator)
+        X = prepare_input(X_test, input_format)
+        with _ignore_feature_name_warnings():
+            if not np.array_equal(compiled.predict(X), estimator.predict(X)):
+                raise AssertionError("Compiled tree disagrees with %s" % estimator_conf["name"])
+
+        gc.collect()
+        stats[estimator_conf["name"]] = {}
+        for label, predictor in (("sklearn", estimator), ("compiled", compiled)):
+            a, b = benchmark_estimator(predictor, X_test, input_format=input_format)
+            stats[estimator_conf["name"]][label] = {"atomic": a, "bulk": b}
+            print(
+                "%s (%s): atomic median %.2f us, bulk median %.3f us/row"
+                % (estimator_conf["name"], label, 1e6 * np.median(a), 1e6 * np.median(b))
+            )
+    return stats
+
+
+def benchmark_online_encoding(configuration, encoder, records, X_expected=None, engine=None):
+    """
+    Time `encoder.encode` per raw record next to the estimators' own single-row `predict`.
+
+    Parameters
+    ----------
+    encoder : a fitted `online_encoder.OnlineEncoder`
+    records : list of raw records, see `online_encoder.read_raw_records`
+    X_expected : optional batch-pipeline features of `records`, checked against the
+        encoder's output before anything is timed
+
+    Returns
+    -------
+    stats : dict with the "encode" runtimes and, per estimator name, the "predict" and
+    end-to-end "encode_predict" runtimes, all per row in seconds
+
+    """
+    engine = engine or default_engine()
+    X_train = configuration['X_train']
+    y_train = configuration['y_train']
+
+    encoded = np.concatenate([encoder.encode(record).copy() for record in records])
+    if X_expected is not None and not np.allclose(encoded, np.asarray(X_expected, dtype=float), equal_nan=True):
+        raise AssertionError("Online encoder disagrees with the batch feature pipeline")
+
+    stats = {"encode": engine.time_each(encoder.encode, [(record,) for record in records])}
+    print("online encoding:", LatencyHistogram.from_samples(stats["encode"]).format_summary())
+
+    def encode_predict(estimator, record):
+        return estimator.predict(encoder.encode(record))
+
+    for estimator_conf in configuration["estimators"]:
+        estimator = estimator_conf["instance"].fit(X_train, y_train)
+        gc.collect()
+        with _ignore_feature_name_warnings():
+            predict = engine.time_each(estimator.predict, _rows(encoded.astype(encoder.dtype)))
+            end_to_end = engine.time_each(encode_predict, [(estimator, record) for record in records])
+        stats[estimator_conf["name"]] = {"predict": predict, "encode_predict": end_to_end}
+        print(
+            "%s: encode median %.2f us, predict median %.2f us, encode + predict median %.2f us"
+            % (
+                estimator_conf["name"],
+                1e6 * np.median(stats["encode"]),
+                1e6 * np.median(predict),
+                1e6 * np.median(end_to_end),
+            )
+        )
+    return stats
+
+
+def make_synthetic_data(n_samples, n_features, informative_ratio=0.5, task="classification", random_state=42):
+    """
+    Generate a synthetic dataset with `make_classification` or `make_regression`.
+
+    Parameters
+    ----------
+    n_samples : number of rows
+    n_features : number of feature columns
+    informative_ratio : fraction of the features that actually carry signal
+    task : 'classification' or 'regression'
+
+    Returns
+    -------
+    X, y : a `pd.DataFrame` with columns f0, f1, ... and a `pd.Series`
+
+    """
+    n_informative = max(1, int(round(informative_ratio * n_features)))
+    if task == "classification":
+        X, y = make_classification(
+            n_samples=n_samples,
+            n_features=n_features,
+            n_informative=n_informative,
+            n_redundant=0,
+            random_state=random_state,
+        )
+    elif task == "regression":
+        X, y = make_regression(
+            n_samples=n_samples,
+            n_features=n_features,
+            n_informative=n_informative,
+            noise=0.1,
+            random_state=random_state,
+        )
+    else:
+        raise ValueError("Unknown task %r" % task)
+    X, y = shuffle(X, y, random_state=random_state)
+    return pd.DataFrame(X, columns=["f%d" % i for i in range(n_features)]), pd.Series(y, name="target")
+
+
+def synthetic_configuration(estimators, n_train=10000, n_test=2000, n_features=11, informative_ratio=0.5, task="classification"):
+    """Build a `configuration` dict like the train.csv one, on synthetic data."""
+    X, y = make_synthetic_data(n_train + n_test, n_features, informative_ratio, task)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=n_test, random_state=42)
+    return {
+        "X_train": X_train,
+        "y_train": y_train,
+        "X_test": X_test,
+        "y_test": y_test,
+        "n_train": X_train.shape[0],
+        "n_test": X_test.shape[0],
+        "n_features": X_train.shape[1],
+        "estimators": estimators,
+    }
+
+
+def benchmark_feature_sweep(estimators, feature_counts=(10, 50, 100, 500, 1000), n_train=10000, n_test=2000, informative_ratio=0.5, task="classification"):
+    """
+    Run the atomic/bulk/throughput suite on synthetic data for every count in `feature_counts`.
+
+    Every estimator is cloned (unfitted) for every feature count, so the entries of
+    `estimators` are not modified.
+
+    Returns
+    -------
+    sweep : dict mapping n_features to {estimator name: {"atomic", "bulk", "throughput"}}
+
+    """
+    sweep = {}
+    for n_features in feature_counts:
+        configuration = synthetic_configuration(
+            [{**estimator_conf, "instance": clone(estimator_conf["instance"])} for estimator_conf in estimators],
+            n_train,
+            n_test,
+            n_features,
+            informative_ratio,
+            task,
+        )
+        print("Synthetic data: %d features" % n_features)
+        throughputs = benchmark_throughputs(configuration)
+        sweep[n_features] = {}
+        for estimator_conf in configuration["estimators"]:
+            # benchmark_throughputs already fitted the instance on this configuration
+            gc.collect()
+            a, b = benchmark_estimator(estimator_conf["instance"], configuration["X_test"])
+            sweep[n_features][estimator_conf["name"]] = {
+                "atomic": a,
+                "bulk": b,
+                "throughput": throughputs[estimator_conf["name"]],
+            }
+            print(
+                "%s: atomic median %.2f us, bulk median %.3f us/row, %.0f predictions/sec"
+                % (estimator_conf["name"], 1e6 * np.median(a), 1e6 * np.median(b), throughputs[estimator_conf["name"]])
+            )
+    return sweep
+
+
+def plot_feature_sweep(sweep, estimators):
+    """Plot median atomic/bulk latency and throughput against the number of features."""
+    feature_counts = sorted(sweep)
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    for estimator_conf in estimators:
+        name = estimator_conf["name"]
+        for pred_type in ("atomic", "bulk"):
+            ax1.plot(
+                feature_counts,
+                [1e6 * np.median(sweep[n][name][pred_type]) for n in feature_counts],
+                marker="o",
+                label="%s (%s)" % (name, pred_type),
+            )
+        ax2.plot(feature_counts, [sweep[n][name]["throughput"] for n in feature_counts], marker="o", label=name)
+
+    for ax in (ax1, ax2):
+        ax.set_xlabel("Number of features")
+        ax.grid(True, which="major", color="lightgrey", alpha=0.5)
+        ax.legend()
+    ax1.set_ylabel("Median Prediction Time per Instance (us)")
+    ax2.set_ylabel("Throughput (predictions/sec)")
+    fig.suptitle("Prediction latency vs. number of features (synthetic data)")
+    plt.show()
+
+
+def benchmark_cold_start(configuration, n_mmap_workers=4):
+    """
+    Measure what loading each fitted estimator costs a freshly started worker.
+
+    Every estimator is serialised with pickle and joblib (with and without compression)
+    and loaded back in a fresh process; decision trees are additionally memory-mapped
+    from `n_mmap_workers` processes at once (see `cold_start.py`).
+
+    Returns
+    -------
+    cold_start : dict mapping estimator names to {"serialization": ..., "shared_mmap": ...}
+
+    """
+    X_train = configuration['X_train']
+    y_train = configuration['y_train']
+    X_test = configuration['X_test']
+
+    cold_start = {}
+    for estimator_conf in configuration["estimators"]:
+        estimator = estimator_conf["instance"].fit(X_train, y_train)
+        cold_start[estimator_conf["name"]] = {"serialization": benchmark_serialization(estimator)}
+        for format_name, result in cold_start[estimator_conf["name"]]["serialization"].items():
+            print(
+                "%s, %s: %.1f KiB on disk, loads in %.2f ms, RSS +%.2f MiB"
+                % (
+                    estimator_conf["name"],
+                    format_name,
+                    result["size"] / 2**10,
+                    1e3 * result["load_time"],
+                    result["rss_delta"] / 2**20,
+                )
+            )
+
+        if isinstance(estimator, DecisionTreeClassifier):
+            shared = benchmark_shared_mmap(estimator, prepare_input(X_test.iloc[:100], "ndarray_float32"), n_mmap_workers)
+            cold_start[estimator_conf["name"]]["shared_mmap"] = shared
+            print("%s, memory-mapped node arrays: %.1f KiB" % (estimator_conf["name"], shared["tree_bytes"] / 2**10))
+            for worker in shared["workers"]:
+                print(
+                    "    worker: loads in %.2f ms, RSS +%.2f MiB, USS %.2f MiB, PSS %s"
+                    % (
+                        1e3 * worker["load_time"],
+                        worker["rss_delta"] / 2**20,
+                        worker["uss"] / 2**20,
+                        "n/a" if worker["pss"] is None else "%.2f MiB" % (worker["pss"] / 2**20),
+                    )
+                )
+    return cold_start
+
+
+def benchmark_fit_scaling(configuration, axes=("samples", "features")):
+    """
+    Measure how fit time, peak memory and model size grow with the training data.
+
+    For every estimator and axis, clones are fitted on geometrically growing subsets of
+    the training set (see `fit_scaling.py`) and the empirical complexity exponent of
+    every cost is reported, with the cost extrapolated to 10x the full training set.
+
+    Returns
+    -------
+    scaling : dict mapping estimator names to {axis: output of `fit_scaling.fit_scaling`}
+
+    """
+    X_train = configuration['X_train']
+    y_train = configuration['y_train']
+
+    scaling = {}
+    for estimator_conf in configuration["estimators"]:
+        scaling[estimator_conf["name"]] = {}
+        for axis in axes:
+            result = fit_scaling(estimator_conf["instance"], X_train, y_train, axis=axis)
+            scaling[estimator_conf["name"]][axis] = result
+            for size, fit_time, peak_memory, model_size in zip(
+                result["sizes"], result["fit_time"], result["peak_memory"], result["model_size"]
+            ):
+                print(
+                    "%s, %s=%d: fit %.3fs, peak allocated %.2f MiB, model %.1f KiB"
+                    % (estimator_conf["name"], axis, size, fit_time, peak_memory / 2**20, model_size / 2**10)
+                )
+            if axis != "samples" or len(result["sizes"]) < 2:
+                continue
+            target_size = 10 * result["sizes"][-1]
+            for cost, unit, scale in (("fit_time", "s", 1), ("peak_memory", "MiB", 2**20), ("model_size", "KiB", 2**10)):
+                k, _ = complexity_exponent(result["sizes"], result[cost])
+                if np.isnan(k):
+                    print("%s: too few non-zero %s measurements to fit an exponent" % (estimator_conf["name"], cost))
+                    continue
+                print(
+                    "%s: %s ~ n^%.2f, predicted %.2f %s at %d samples"
+                    % (
+                        estimator_conf["name"],
+                        cost,
+                        k,
+                        extrapolate(result["sizes"], result[cost], target_size) / scale,
+                        unit,
+                        target_size,
+                    )
+                )
+    return scaling
+
+
+def plot_fit_scaling(scaling, configuration, axis="samples"):
+    """Plot fit time, peak memory and model size against the subset size on log-log axes."""
+    fig, axes = plt.subplots(1, 3, figsize=(18, 6))
+    costs = (("fit_time", "Fit time (s)", 1), ("peak_memory", "Peak allocated memory (MiB)", 2**20), ("model_size", "Model size (KiB)", 2**10))
+    for estimator_conf in configuration["estimators"]:
+        result = scaling[estimator_conf["name"]][axis]
+        for ax, (cost, ylabel, scale) in zip(axes, costs):
+            ax.loglog(result["sizes"], result[cost] / scale, marker="o", label=estimator_conf["name"])
+            ax.set_ylabel(ylabel)
+    for ax in axes:
+        ax.set_xlabel("Training %s" % axis)
+        ax.grid(True, which="major", color="lightgrey", alpha=0.5)
+        ax.legend()
+    fig.suptitle("Training cost scaling with the number of %s" % axis)
+    plt.show()
+
+
+def plot_batch_size_sweep(curves, configuration):
+    """
+    Plot per-row latency and throughput against batch size, one curve per estimator.
+
+    Parameters
+    ----------
+    curves : dict mapping estimator names to the output of `batch_size_sweep_estimator`
+
+    """
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    for estimator_conf in configuration["estimators"]:
+        curve = curves[estimator_conf["name"]]
+        ax1.loglog(curve["batch_sizes"], 1e6 * curve["per_row_latency"], marker="o", label=estimator_conf["name"])
+        ax2.loglog(curve["batch_sizes"], curve["throughput"], marker="o", label=estimator_conf["name"])
+        knee = find_batching_knee(curve)
+        ax2.axvline(knee, color="lightgrey", linestyle="--")
+
+    for ax in (ax1, ax2):
+        ax.set_xlabel("Batch size (rows)")
+        ax.grid(True, which="major", color="lightgrey", alpha=0.5)
+        ax.legend()
+    ax1.set_ylabel("Prediction Time per Row (us)")
+    ax2.set_ylabel("Throughput (rows/sec)")
+    fig.suptitle(
+        "Batch size sweep (%d features)" % configuration["n_features"]
+    )
+    plt.show()
+
+def benchmark(configuration, sweep_batch_sizes=False):
+    """Run the whole benchmark.
+
+    With `sweep_batch_sizes=True` every estimator is additionally measured over batch
+    sizes 1, 2, 4, ..., n_test and a latency/throughput curve is plotted per estimator.
+    """
 
     # Use the already pre-split dataset instead of generating a new one
     X_train = configuration['X_train']
@@ -192,7 +934,13 @@ def benchmark(configuration):
         estimator_conf["instance"].fit(X_train, y_train)
         gc.collect()
         a, b = benchmark_estimator(estimator_conf["instance"], X_test)
-        stats[estimator_conf["name"]] = {"atomic": a, "bulk": b}
+        atomic_histogram = LatencyHistogram.from_samples(a)
+        print("Atomic latency:", atomic_histogram.format_summary())
+        stats[estimator_conf["name"]] = {"atomic": a, "bulk": b, "atomic_histogram": atomic_histogram}
+        if sweep_batch_sizes:
+            curve = batch_size_sweep_estimator(estimator_conf["instance"], X_test)
+            stats[estimator_conf["name"]]["sweep"] = curve
+            print("Batching stops paying off after batch size", find_batching_knee(curve))
 
     cls_names = [
         estimator_conf["name"] for estimator_conf in configuration["estimators"]
@@ -201,50 +949,19 @@ def benchmark(configuration):
     boxplot_runtimes(runtimes, "atomic", configuration)
     runtimes = [1e6 * stats[clf_name]["bulk"] for clf_name in cls_names]
     boxplot_runtimes(runtimes, "bulk (%d)" % configuration["n_test"], configuration)
+    if sweep_batch_sizes:
+        plot_batch_size_sweep(
+            {clf_name: stats[clf_name]["sweep"] for clf_name in cls_names}, configuration
+        )
+    return stats
 
 
 
 
-# Load your dataset
-df = pd.read_csv('ML/assets/train.csv')
-
-# Drop rows where target or important features are missing (optional, based on your dataset)
-df = df.dropna(subset=['OpenStatus'])
-
-# Preprocess columns with missing values, you can use fillna or drop rows
-df.fillna(value={'Tag1': 'unknown', 'Tag2': 'unknown', 'Tag3': 'unknown', 'Tag4': 'unknown', 'Tag5': 'unknown'}, inplace=True)
-
-# Encode categorical variables using LabelEncoder
-le = LabelEncoder()
-
-# Convert 'PostCreationDate' and 'OwnerCreationDate' to datetime and extract features like year, month, etc.
-df['PostCreationDate'] = pd.to_datetime(df['PostCreationDate'], errors='coerce')
-df['OwnerCreationDate'] = pd.to_datetime(df['OwnerCreationDate'], errors='coerce')
-
-# Create new features from datetime
-df['PostYear'] = df['PostCreationDate'].dt.year
-df['OwnerYear'] = df['OwnerCreationDate'].dt.year
-
-# Select categorical columns to encode
-for column in ['OpenStatus', 'Tag1', 'Tag2', 'Tag3', 'Tag4', 'Tag5']:
-    df[column] = le.fit_transform(df[column].astype(str))
-
-# Define features (X) and target (y)
-X = df[['PostId', 'OwnerUserId', 'ReputationAtPostCreation', 'OwnerUndeletedAnswerCountAtPostTime', 'PostYear', 'OwnerYear', 'Tag1', 'Tag2', 'Tag3', 'Tag4', 'Tag5']]
-y = df['OpenStatus']
-
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Define the configuration dictionary
-configuration = {
-    "X_train": X_train,
-    "y_train": y_train,
-    "X_test": X_test,
-    "y_test": y_test,
-    "n_train": X_train.shape[0],  # Number of training samples
-    "n_test": X_test.shape[0],    # Number of testing samples
-    "n_features": X_train.shape[1],  # Number of features (columns) in X
-    "estimators": [
+# Worker processes re-import this module when they are spawned, so the data loading
+# and the benchmark run must only happen in the main process.
+if __name__ == "__main__":
+    estimators = [
         {
             "name": "DecisionTreeClassifier",
             "instance": DecisionTreeClassifier(random_state=42),
@@ -254,9 +971,51 @@ configuration = {
                 clf.tree_.node_count       # Total number of nodes in the tree
             ),
         }
-    ],
-}
+    ]
 
-benchmark(configuration)
-throughputs = benchmark_throughputs(configuration)
-plot_benchmark_throughput(throughputs, configuration)
+    if os.path.exists(DEFAULT_CSV_PATH):
+        # Load the preprocessed dataset (cached after the first run, see feature_pipeline.py)
+        X, y = load_features()
+
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+        # Define the configuration dictionary
+        configuration = {
+            "X_train": X_train,
+            "y_train": y_train,
+            "X_test": X_test,
+            "y_test": y_test,
+            "n_train": X_train.shape[0],  # Number of training samples
+            "n_test": X_test.shape[0],    # Number of testing samples
+            "n_features": X_train.shape[1],  # Number of features (columns) in X
+            "estimators": estimators,
+        }
+        dataset_hash = file_sha256(DEFAULT_CSV_PATH)
+    else:
+        # train.csv is not part of the repository: fall back to synthetic data of the same shape
+        print("%s not found, benchmarking on synthetic data" % DEFAULT_CSV_PATH)
+        configuration = synthetic_configuration(estimators, n_features=11)
+        dataset_hash = None
+
+    stats = benchmark(configuration, sweep_batch_sizes=True)
+    fit_scaling_stats = benchmark_fit_scaling(configuration)
+    plot_fit_scaling(fit_scaling_stats, configuration)
+    throughputs = benchmark_throughputs(configuration)
+    run = record_run(stats, throughputs, dataset_hash=dataset_hash)
+    print("Stored benchmark run", run["run_id"])
+    plot_benchmark_throughput(throughputs, configuration)
+    scaling = benchmark_throughput_scaling(configuration)
+    plot_throughput_scaling(scaling, configuration)
+    benchmark_thread_counts(configuration, pin=True)
+    open_loop = benchmark_open_loop(configuration)
+    plot_open_loop(open_loop, configuration)
+    format_stats = benchmark_input_formats(configuration)
+    boxplot_input_formats(format_stats, "atomic", configuration)
+    boxplot_input_formats(format_stats, "bulk", configuration)
+    benchmark_compiled_trees(configuration)
+    if os.path.exists(DEFAULT_CSV_PATH):
+        records = read_raw_records(DEFAULT_CSV_PATH, n_rows=1000)
+        benchmark_online_encoding(configuration, OnlineEncoder.from_pipeline(), records, X.iloc[: len(records)])
+    benchmark_cold_start(configuration)
+    feature_sweep = benchmark_feature_sweep(estimators)
+    plot_feature_sweep(feature_sweep, estimators)
@@ -0,0 +1,168 @@
+"""
+Model cold-start benchmark: serialised size, load time and memory of fitted estimators.
+
+`benchmark_estimator` only times `predict`, but a restarted inference worker first has to
+load its model. `benchmark_serialization` writes each fitted estimator with pickle and
+joblib (uncompressed and compressed) and measures, for every format:
+
+- the size of the file,
+- the load time and the RSS growth caused by loading it, measured in a fresh Python
+  process so nothing is already imported or cached in the interpreter (the file itself
+  is still in the OS page cache, since it was just written).
+
+scikit-learn's `Tree` copies its node arrays into private memory when it is unpickled, so
+even `joblib.load(..., mmap_mode='r')` cannot share them. `benchmark_shared_mmap` instead
+saves a `tree_inference.CompiledTree` as `.npy` files and has several worker processes
+memory-map the same files at once. Their proportional set size (PSS) shows the node
+arrays being paid for once, in the page cache, rather than once per worker.
+"""
+import json
+import multiprocessing
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import psutil
+
+from tree_inference import CompiledTree
+
+
+def _pickle_dump(estimator, path):
+    with open(path, "wb") as f:
+        pickle.dump(estimator, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# name -> (dump, file suffix); every format is loaded back by `_load`.
+SERIALIZATION_FORMATS = {
+    "pickle": (_pickle_dump, ".pkl"),
+    "joblib": (lambda estimator, path: joblib.dump(estimator, path, compress=0), ".joblib"),
+    "joblib_zlib3": (lambda estimator, path: joblib.dump(estimator, path, compress=("zlib", 3)), ".joblib.z"),
+    "joblib_lz4": (lambda estimator, path: joblib.dump(estimator, path, compress=("lz4", 3)), ".joblib.lz4"),
+}
+
+
+def _load(format_name, path):
+    if format_name == "pickle":
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    return joblib.load(path)
+
+
+def _measure_load(format_name, path):
+    """Runs in the child process started by `measure_cold_load`."""
+    # Import what unpickling needs up front, so only the model load is timed.
+    import sklearn.tree  # noqa: F401
+
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    start = time.perf_counter()
+    _load(format_name, path)
+    load_time = time.perf_counter() - start
+    rss_after = process.memory_info().rss
+    print(json.dumps({"load_time": load_time, "rss_delta": rss_after - rss_before}))
+
+
+def measure_cold_load(format_name, path):
+    """Load `path` in a fresh Python process and return its load time and RSS growth."""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "load", format_name, path],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark_serialization(estimator, formats=tuple(SERIALIZATION_FORMATS), n_repeats=5):
+    """
+    Serialise `estimator` in every format and measure size, load time and RSS growth.
+
+    Returns
+    -------
+    results : dict mapping format names to {"size": bytes, "load_time": median seconds,
+    "rss_delta": median bytes}
+
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for format_name in formats:
+            dump, suffix = SERIALIZATION_FORMATS[format_name]
+            path = os.path.join(directory, "model" + suffix)
+            try:
+                dump(estimator, path)
+            except (ImportError, ValueError) as e:
+                # e.g. lz4 compression without the lz4 package installed
+                print("Skipping %s: %s" % (format_name, e))
+                continue
+            loads = [measure_cold_load(format_name, path) for _ in range(n_repeats)]
+            results[format_name] = {
+                "size": os.path.getsize(path),
+                "load_time": sorted(load["load_time"] for load in loads)[n_repeats // 2],
+                "rss_delta": sorted(load["rss_delta"] for load in loads)[n_repeats // 2],
+            }
+    return results
+
+
+def _shared_mmap_worker(directory, X_row, barrier, results):
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    start = time.perf_counter()
+    tree = CompiledTree.load(directory, mmap_mode="r")
+    tree.predict(X_row)
+    load_time = time.perf_counter() - start
+    # Wait until every worker has the tree mapped, so PSS splits the shared pages.
+    barrier.wait()
+    memory = process.memory_full_info()
+    results.put(
+        {
+            "load_time": load_time,
+            "rss_delta": memory.rss - rss_before,
+            "uss": memory.uss,
+            "pss": getattr(memory, "pss", None),
+        }
+    )
+    barrier.wait()
+
+
+def benchmark_shared_mmap(clf, X_rows, n_workers=4):
+    """
+    Memory-map one compiled copy of `clf` from `n_workers` processes at the same time.
+
+    `X_rows` (a small 2D array) is predicted by every worker, which touches the node
+    pages it needs.
+
+    Returns
+    -------
+    results : dict with "tree_bytes" (size of the node arrays on disk) and "workers", a
+    list of per-worker {"load_time", "rss_delta", "uss", "pss"}
+
+    """
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        CompiledTree(clf).save(directory)
+        tree_bytes = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory)
+            if name.endswith(".npy")
+        )
+        barrier = context.Barrier(n_workers)
+        queue = context.Queue()
+        workers = [
+            context.Process(target=_shared_mmap_worker, args=(directory, X_rows, barrier, queue))
+            for _ in range(n_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        results = [queue.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+    return {"tree_bytes": tree_bytes, "workers": results}
+
+
+if __name__ == "__main__" and len(sys.argv) == 4 and sys.argv[1] == "load":
+    _measure_load(sys.argv[2], sys.argv[3])
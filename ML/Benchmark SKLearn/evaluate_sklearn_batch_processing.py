@@ -1,45 +1,29 @@
-import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.metrics import accuracy_score
-from sklearn.preprocessing import LabelEncoder
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+import os
+import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
-import psutil
-from memory_profiler import memory_usage
 
+from feature_pipeline import load_feature_arrays, load_features
+from resource_sampler import ResourceSampler
+from out_of_core import (
+    VotingTreeEnsemble,
+    block_split,
+    fit_batch,
+    init_batch_worker,
+    iter_batches,
+    read_blocks,
+    write_shared_split,
+)
 
-# Load dataset
-df = pd.read_csv('ML/assets/train.csv')
 
-# Drop rows where target or important features are missing (optional, based on your dataset)
-df = df.dropna(subset=['OpenStatus'])
-
-# Preprocess columns with missing values, we can use fillna or drop rows
-df.fillna(value={'Tag1': 'unknown', 'Tag2': 'unknown', 'Tag3': 'unknown', 'Tag4': 'unknown', 'Tag5': 'unknown'}, inplace=True)
-
-# Encode categorical variables using LabelEncoder
-le = LabelEncoder()
-
-# Convert 'PostCreationDate' and 'OwnerCreationDate' to datetime and extract features like year, month, etc.
-df['PostCreationDate'] = pd.to_datetime(df['PostCreationDate'], errors='coerce')
-df['OwnerCreationDate'] = pd.to_datetime(df['OwnerCreationDate'], errors='coerce')
-
-# Create new features from datetime
-df['PostYear'] = df['PostCreationDate'].dt.year
-df['OwnerYear'] = df['OwnerCreationDate'].dt.year
-
-# Select categorical columns to encode
-for column in ['OpenStatus', 'Tag1', 'Tag2', 'Tag3', 'Tag4', 'Tag5']:
-    df[column] = le.fit_transform(df[column].astype(str))
-
-# Define features (X) and target (y)
-X = df[['PostId', 'OwnerUserId', 'ReputationAtPostCreation', 'OwnerUndeletedAnswerCountAtPostTime', 'PostYear', 'OwnerYear', 'Tag1', 'Tag2', 'Tag3', 'Tag4', 'Tag5']]
-y = df['OpenStatus']
-
-
-def batch_processing(X, y, batch_size=10000):
+def batch_processing(X, y, batch_size=10000, sampler=None):
     # Split data into training and test sets
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
@@ -48,9 +32,15 @@ def batch_processing(X, y, batch_size=10000):
 
     total_time = 0
     batch_accuracies = []
+    wall_start = time.perf_counter()
 
     print(f"Total number of batches: {num_batches}\n")
 
+    # Sample CPU and memory in the background, including peaks inside clf.fit
+    owns_sampler = sampler is None
+    if owns_sampler:
+        sampler = ResourceSampler().start()
+
     # Start tqdm progress bar
     for i in tqdm(range(num_batches), desc="Processing Batches"):
         # Get the current batch
@@ -60,37 +50,149 @@ def batch_processing(X, y, batch_size=10000):
         X_batch = X_train[start:end]
         y_batch = y_train[start:end]
 
-        # Monitor CPU usage and memory usage
-        start_cpu = psutil.cpu_percent(interval=None)
-        mem_usage_before = memory_usage()[0]
-
         # Train a DecisionTreeClassifier on this batch
-        clf = DecisionTreeClassifier()
-        start_time = time.time()
-        clf.fit(X_batch, y_batch)
-        end_time = time.time()
+        clf = DecisionTreeClassifier(random_state=42)
+        phase = f"fit batch {i+1}"
+        with sampler.phase(phase):
+            clf.fit(X_batch, y_batch)
+        usage = sampler.phases[phase]
 
         # Measure time taken to train
-        training_time = end_time - start_time
+        training_time = usage["duration"]
         total_time += training_time
 
-        # Monitor CPU and memory after training
-        end_cpu = psutil.cpu_percent(interval=None)
-        mem_usage_after = memory_usage()[0]
-
         # Evaluate the batch model on test data
         y_pred = clf.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
         batch_accuracies.append(accuracy)
 
         print(f"\nBatch {i+1}/{num_batches} - Training Time: {training_time:.4f} seconds")
-        print(f"CPU usage: {end_cpu - start_cpu}%")
-        print(f"Memory used: {mem_usage_after - mem_usage_before:.2f} MiB")
+        print(f"CPU usage: {usage['cpu_percent']:.0f}%")
+        print(f"Peak RSS: {usage['rss_peak'] / 2**20:.2f} MiB (+{usage['rss_delta'] / 2**20:.2f} MiB), peak traced memory: {usage['traced_peak'] / 2**20:.2f} MiB")
         print(f"Accuracy: {accuracy:.4f}")
 
+    wall_time = time.perf_counter() - wall_start
+    if owns_sampler:
+        sampler.stop()
+
     print(f"\nTotal Training Time: {total_time:.4f} seconds")
     print(f"Mean Accuracy across batches: {np.mean(batch_accuracies):.4f}")
+    return {"accuracies": batch_accuracies, "wall_time": wall_time}
+
+
+def parallel_batch_processing(X, y, batch_size=10000, n_jobs=None):
+    """
+    Fit and evaluate the batches of `batch_processing` across a process pool.
+
+    The split is written once to memory-mapped `.npy` files that every worker opens in its
+    initializer, so tasks only carry a (start, end) row range. Results come back in batch
+    order.
+    """
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    num_batches = int(np.ceil(X_train.shape[0] / batch_size))
+    ranges = [(i * batch_size, min((i + 1) * batch_size, X_train.shape[0])) for i in range(num_batches)]
+    n_jobs = n_jobs or os.cpu_count()
+
+    print(f"Total number of batches: {num_batches}, workers: {n_jobs}\n")
 
+    with tempfile.TemporaryDirectory() as directory:
+        write_shared_split(directory, X_train, y_train, X_test, y_test)
+        wall_start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_batch_worker, initargs=(directory,)) as executor:
+            results = list(executor.map(fit_batch, *zip(*ranges)))
+        wall_time = time.perf_counter() - wall_start
 
-# Run the batch processing
-batch_processing(X, y, batch_size=100000)
+    training_times = [training_time for training_time, _ in results]
+    batch_accuracies = [accuracy for _, accuracy in results]
+    for i, (training_time, accuracy) in enumerate(results):
+        print(f"Batch {i+1}/{num_batches} - Training Time: {training_time:.4f} seconds, Accuracy: {accuracy:.4f}")
+
+    print(f"\nTotal Training Time (summed over workers): {sum(training_times):.4f} seconds")
+    print(f"Wall-clock Time: {wall_time:.4f} seconds")
+    print(f"Mean Accuracy across batches: {np.mean(batch_accuracies):.4f}")
+    return {"training_times": training_times, "accuracies": batch_accuracies, "wall_time": wall_time}
+
+
+def _report(name, clf, fit_time, peak_memory, X_test, y_test):
+    accuracy = accuracy_score(y_test, clf.predict(X_test))
+    print(f"\n{name}")
+    print(f"Total Training Time: {fit_time:.4f} seconds")
+    print(f"Peak traced memory during training: {peak_memory / 2**20:.2f} MiB")
+    print(f"Final model accuracy: {accuracy:.4f}")
+    return {"accuracy": accuracy, "fit_time": fit_time, "peak_memory": peak_memory}
+
+
+def incremental_training(batch_size=10000, n_epochs=1):
+    """
+    Train one model over all batches with `partial_fit`, streaming them from the feature cache.
+
+    The features are standardised first (a separate streaming pass to learn the scaler),
+    because SGD is sensitive to the raw feature scales (PostId is in the millions).
+    """
+    X_mm, y_mm, _ = load_feature_arrays()
+    # Contiguous blocks of rows, so every batch is a sequential read of the cache
+    train_blocks, _, test_blocks = block_split(X_mm.shape[0], batch_size)
+    classes = np.unique(y_mm)
+
+    scaler = StandardScaler()
+    clf = SGDClassifier(loss="log_loss", random_state=42)
+
+    with ResourceSampler() as sampler, sampler.phase("incremental training"):
+        for X_batch, _ in iter_batches(X_mm, y_mm, train_blocks):
+            scaler.partial_fit(np.nan_to_num(X_batch))
+        for epoch in range(n_epochs):
+            # A new batch order every epoch, since the rows within a batch stay in file order
+            batches = iter_batches(X_mm, y_mm, train_blocks, shuffle_seed=epoch)
+            for X_batch, y_batch in tqdm(batches, desc="partial_fit", total=len(train_blocks)):
+                clf.partial_fit(scaler.transform(np.nan_to_num(X_batch)), y_batch, classes=classes)
+    fit_time = sampler.phases["incremental training"]["duration"]
+    peak_memory = sampler.phases["incremental training"]["traced_peak"]
+
+    X_test, y_test = read_blocks(X_mm, y_mm, test_blocks)
+    X_test = scaler.transform(np.nan_to_num(X_test))
+    return _report("Incremental SGDClassifier (partial_fit)", clf, fit_time, peak_memory, X_test, y_test)
+
+
+def voting_ensemble_training(batch_size=10000, max_estimators=10):
+    """
+    Train one DecisionTreeClassifier per streamed batch and keep the best `max_estimators`
+    of them (by accuracy on a small validation split) as a majority-vote ensemble.
+    """
+    X_mm, y_mm, _ = load_feature_arrays()
+    train_blocks, validation_block, test_blocks = block_split(X_mm.shape[0], batch_size)
+    ensemble = VotingTreeEnsemble(np.unique(y_mm), max_estimators=max_estimators)
+    X_validation, y_validation = read_blocks(X_mm, y_mm, [validation_block])
+
+    fit_time = 0
+    with ResourceSampler() as sampler, sampler.phase("voting ensemble training"):
+        batches = iter_batches(X_mm, y_mm, train_blocks, shuffle_seed=0)
+        for X_batch, y_batch in tqdm(batches, desc="Voting ensemble", total=len(train_blocks)):
+            clf = DecisionTreeClassifier(random_state=42)
+            start_time = time.perf_counter()
+            clf.fit(X_batch, y_batch)
+            fit_time += time.perf_counter() - start_time
+            ensemble.add(clf, accuracy_score(y_validation, clf.predict(X_validation)))
+    peak_memory = sampler.phases["voting ensemble training"]["traced_peak"]
+
+    X_test, y_test = read_blocks(X_mm, y_mm, test_blocks)
+    return _report(
+        f"Voting ensemble of {len(ensemble.estimators)} DecisionTreeClassifiers", ensemble, fit_time, peak_memory, X_test, y_test
+    )
+
+
+# Worker processes re-import this module when they are spawned, so the data loading
+# and the runs must only happen in the main process.
+if __name__ == "__main__":
+    # Load the preprocessed dataset (cached after the first run, see feature_pipeline.py)
+    X, y = load_features()
+
+    # Run the batch processing
+    sequential = batch_processing(X, y, batch_size=100000)
+
+    # Same batches across all cores
+    parallel = parallel_batch_processing(X, y, batch_size=100000)
+    print(f"Wall-clock speedup over the sequential path: {sequential['wall_time'] / parallel['wall_time']:.2f}x")
+
+    # Train usable final models out of core
+    incremental_training(batch_size=100000)
+    voting_ensemble_training(batch_size=100000)
@@ -0,0 +1,307 @@
+"""
+Feature pipeline shared by `benchmark_sklearn_prediction.py` and
+`evaluate_sklearn_batch_processing.py`.
+
+Parsing `train.csv`, parsing the dates and encoding the tag columns takes minutes on the
+full Kaggle file, and both scripts used to repeat it on every run.
+`load_features` does it once and stores the encoded feature matrix and the target as
+NumPy files in a cache directory keyed by the hash of the source file and
+`PIPELINE_VERSION`. Later runs memory-map the cached arrays instead. The source hash is
+itself remembered in the cache directory, keyed by the file's path, size and modification
+time, so an unchanged file is not read again at start-up.
+
+The feature matrix is stored column-major (Fortran order), so every feature is one
+contiguous column on disk and the DataFrame built on top of it needs no copy. The sorted
+tag and target vocabularies are stored next to it, so `online_encoder.OnlineEncoder`
+can encode single raw rows exactly like the batch pipeline did.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Bump this whenever `build_features` changes, so stale caches are not reused.
+PIPELINE_VERSION = 4
+
+DEFAULT_CSV_PATH = 'ML/assets/train.csv'
+DEFAULT_CACHE_DIR = 'ML/assets/.feature_cache'
+
+TAG_COLUMNS = ['Tag1', 'Tag2', 'Tag3', 'Tag4', 'Tag5']
+TARGET_COLUMN = 'OpenStatus'
+FEATURE_COLUMNS = [
+    'PostId', 'OwnerUserId', 'ReputationAtPostCreation', 'OwnerUndeletedAnswerCountAtPostTime',
+    'PostYear', 'OwnerYear', *TAG_COLUMNS,
+]
+
+# Raw columns the features are built from, with the compact dtypes they are read as.
+# The title/body text and closing date are never read.
+NUMERIC_COLUMNS = ['PostId', 'OwnerUserId', 'ReputationAtPostCreation', 'OwnerUndeletedAnswerCountAtPostTime']
+DATE_COLUMNS = {'PostCreationDate': 'PostYear', 'OwnerCreationDate': 'OwnerYear'}
+DATE_FORMAT = '%m/%d/%Y %H:%M:%S'
+RAW_DTYPES = {
+    'PostId': 'int32',
+    'OwnerUserId': 'int32',
+    'ReputationAtPostCreation': 'float32',
+    'OwnerUndeletedAnswerCountAtPostTime': 'float32',
+    'PostCreationDate': 'str',
+    'OwnerCreationDate': 'str',
+    **{column: 'category' for column in [*TAG_COLUMNS, TARGET_COLUMN]},
+}
+
+
+def _encode_chunk(column, vocabulary):
+    """
+    Map a categorical chunk column to ids in `vocabulary`, growing it as new values appear.
+
+    Missing values are encoded as 'unknown', like the original `fillna` did.
+    """
+    # Categories only seen in dropped rows must not enter the vocabulary.
+    column = column.cat.remove_unused_categories()
+    categories = column.cat.categories.astype(str)
+    ids = np.array(
+        [vocabulary.setdefault(category, len(vocabulary)) for category in categories] + [0],
+        dtype=np.int32,
+    )
+    codes = column.cat.codes.to_numpy()
+    if (codes == -1).any():
+        # Code -1 indexes the last slot of `ids`, reserved for the 'unknown' id.
+        ids[-1] = vocabulary.setdefault('unknown', len(vocabulary))
+    return ids[codes]
+
+
+def _sorted_ids(vocabulary):
+    # `vocabulary` ids are in order of first appearance. `LabelEncoder` numbers classes
+    # in sorted order, so remap to that to keep the encoding identical.
+    ranks = np.empty(len(vocabulary), dtype=np.int32)
+    for rank, value in enumerate(sorted(vocabulary)):
+        ranks[vocabulary[value]] = rank
+    return ranks
+
+
+def build_features(csv_path=DEFAULT_CSV_PATH, chunksize=100_000):
+    """
+    Run the preprocessing on `csv_path` and return the features (X) and target (y).
+
+    See `build_features_with_vocabularies`.
+    """
+    X, y, _ = build_features_with_vocabularies(csv_path, chunksize)
+    return X, y
+
+
+def build_features_with_vocabularies(csv_path=DEFAULT_CSV_PATH, chunksize=100_000):
+    """
+    Run the preprocessing on `csv_path` and return the features (X), the target (y) and
+    the vocabularies of the encoded columns.
+
+    The CSV is streamed in chunks of `chunksize` rows, reading only the columns the
+    features need with compact dtypes, so the full raw frame (with its unused title and
+    body text) is never materialised. Tags and the target are encoded against
+    vocabularies built up across chunks; the resulting codes are the same ones
+    `LabelEncoder` would assign on the full column, i.e. the position of each value in
+    the sorted vocabulary returned for its column.
+    """
+    vocabularies = {column: {} for column in [TARGET_COLUMN, *TAG_COLUMNS]}
+    parts = {column: [] for column in [*FEATURE_COLUMNS, TARGET_COLUMN]}
+
+    # Only empty fields are missing: 'null', 'nan', 'NA', ... are real tags and must not be
+    # read as NaN (the online encoder sees them as the strings they are).
+    chunks = pd.read_csv(
+        csv_path,
+        usecols=RAW_DTYPES.keys(),
+        dtype=RAW_DTYPES,
+        keep_default_na=False,
+        na_values=[''],
+        chunksize=chunksize,
+    )
+    for chunk in chunks:
+        # Drop rows where the target is missing
+        chunk = chunk[chunk[TARGET_COLUMN].notna()]
+
+        for column in NUMERIC_COLUMNS:
+            parts[column].append(chunk[column].to_numpy())
+
+        # Parse dates with a fixed format and keep only the year
+        for date_column, year_column in DATE_COLUMNS.items():
+            dates = pd.to_datetime(chunk[date_column], format=DATE_FORMAT, errors='coerce')
+            parts[year_column].append(dates.dt.year.to_numpy(dtype=np.float32, na_value=np.nan))
+
+        for column, vocabulary in vocabularies.items():
+            parts[column].append(_encode_chunk(chunk[column], vocabulary))
+
+    n_rows = sum(len(part) for part in parts[TARGET_COLUMN])
+    X = np.empty((n_rows, len(FEATURE_COLUMNS)), dtype=np.float64, order='F')
+    for i, column in enumerate(FEATURE_COLUMNS):
+        values = np.concatenate(parts.pop(column))
+        if column in vocabularies:
+            values = _sorted_ids(vocabularies[column])[values]
+        X[:, i] = values
+    y = _sorted_ids(vocabularies[TARGET_COLUMN])[np.concatenate(parts.pop(TARGET_COLUMN))]
+
+    return (
+        pd.DataFrame(X, columns=FEATURE_COLUMNS),
+        pd.Series(y, name=TARGET_COLUMN),
+        {column: sorted(vocabulary) for column, vocabulary in vocabularies.items()},
+    )
+
+
+# Hashes already computed in this process, keyed by (path, size, mtime).
+_sha256_memo = {}
+
+# Name of the file in the cache directory that keeps the source hashes across runs.
+SOURCE_HASHES_FILE = 'source_hashes.json'
+
+
+def _read_source_hashes(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, SOURCE_HASHES_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_source_hashes(cache_dir, hashes):
+    # Same write-then-rename as `_write_cache`, so a concurrent run never reads half a file.
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(hashes, f)
+        os.replace(tmp_path, os.path.join(cache_dir, SOURCE_HASHES_FILE))
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def file_sha256(path, chunk_size=1 << 20, cache_dir=None):
+    """
+    Hash the contents of `path` without reading the whole file into memory.
+
+    With `cache_dir`, the hash is also stored in a sidecar file there, keyed by the
+    absolute path, size and modification time, so a new process whose file is unchanged
+    does not read it again.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if key in _sha256_memo:
+        return _sha256_memo[key]
+
+    hashes = _read_source_hashes(cache_dir) if cache_dir is not None else {}
+    stored = hashes.get(key[0])
+    if stored is not None and (stored['size'], stored['mtime_ns']) == key[1:]:
+        _sha256_memo[key] = stored['sha256']
+        return stored['sha256']
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    _sha256_memo[key] = digest.hexdigest()
+    if cache_dir is not None:
+        hashes[key[0]] = {'size': key[1], 'mtime_ns': key[2], 'sha256': _sha256_memo[key]}
+        _write_source_hashes(cache_dir, hashes)
+    return _sha256_memo[key]
+
+
+def _cache_path(csv_path, cache_dir):
+    key = "%s-v%d" % (file_sha256(csv_path, cache_dir=cache_dir), PIPELINE_VERSION)
+    return os.path.join(cache_dir, key)
+
+
+def _write_cache(path, X, y, vocabularies, source_hash):
+    # Write into a temporary directory first and rename it, so an interrupted run never
+    # leaves a half-written cache behind.
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(dir=parent)
+    try:
+        np.save(os.path.join(tmp_path, 'X.npy'), np.asfortranarray(X.to_numpy(dtype=np.float64)))
+        np.save(os.path.join(tmp_path, 'y.npy'), y.to_numpy())
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump(
+                {
+                    'columns': list(X.columns),
+                    'target': y.name,
+                    'vocabularies': vocabularies,
+                    'source_sha256': source_hash,
+                    'pipeline_version': PIPELINE_VERSION,
+                },
+                f,
+            )
+        os.replace(tmp_path, path)
+    except OSError:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.isdir(path):
+            raise
+
+
+def _read_cache(path):
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    X = np.load(os.path.join(path, 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(path, 'y.npy'), mmap_mode='r')
+    return X, y, meta
+
+
+def _cached(csv_path, cache_dir):
+    path = _cache_path(csv_path, cache_dir)
+    if not os.path.isdir(path):
+        X, y, vocabularies = build_features_with_vocabularies(csv_path)
+        _write_cache(path, X, y, vocabularies, os.path.basename(path).split('-')[0])
+    return _read_cache(path)
+
+
+def load_features(csv_path=DEFAULT_CSV_PATH, cache_dir=DEFAULT_CACHE_DIR, use_cache=True):
+    """
+    Return the preprocessed features (X) and target (y) for `csv_path`.
+
+    Parameters
+    ----------
+    csv_path : path of the raw Kaggle `train.csv`
+    cache_dir : directory holding one sub-directory per (source hash, pipeline version)
+    use_cache : set to False to always rebuild from the CSV and skip the cache
+
+    Returns
+    -------
+    X, y : a `pd.DataFrame` of the float64 feature matrix and a `pd.Series` of the
+    encoded target. When served from the cache both are read-only memory maps.
+
+    """
+    if not use_cache:
+        return build_features(csv_path)
+
+    X, y, meta = _cached(csv_path, cache_dir)
+    return (
+        pd.DataFrame(X, columns=meta['columns'], copy=False),
+        pd.Series(y, name=meta['target'], copy=False),
+    )
+
+
+def load_feature_arrays(csv_path=DEFAULT_CSV_PATH, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Like `load_features`, but return the cached arrays as raw `np.memmap`s.
+
+    Nothing is read from disk until rows are indexed, which lets callers stream batches
+    out of the cache without ever loading the full matrix.
+
+    Returns
+    -------
+    X, y, columns : read-only memory-mapped feature matrix (column-major) and target,
+    and the list of feature names
+
+    """
+    X, y, meta = _cached(csv_path, cache_dir)
+    return X, y, meta['columns']
+
+
+def load_vocabularies(csv_path=DEFAULT_CSV_PATH, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Return the sorted vocabulary of every encoded column (tags and target) of `csv_path`.
+
+    An encoded value is the position of the raw value in its column's vocabulary.
+    """
+    _, _, meta = _cached(csv_path, cache_dir)
+    return meta['vocabularies']
@@ -0,0 +1,122 @@
+"""
+Training-time scaling of an estimator with the number of samples and features.
+
+`fit_scaling` refits a fresh clone of an estimator on geometrically growing subsets of the
+training data (rows, or columns) and records for every size:
+
+- the fit time,
+- the peak memory allocated during `fit`, as the `tracemalloc` peak of a
+  `ResourceSampler` phase (Python and NumPy allocations). RSS is no use here: small fits
+  reuse heap the process already holds, so the RSS barely moves. Tracing slows down
+  allocations, so the memory is measured on a second, untimed fit,
+- the size of the fitted model, as the length of its pickle.
+
+`complexity_exponent` fits `cost = a * n ** k` on a log-log scale. The exponent `k` is
+the empirical complexity of the estimator on this data (about 1 for linear models,
+n log n shows up as slightly above 1), and `extrapolate` uses the fit to predict what
+retraining will cost once the dataset has grown.
+"""
+import pickle
+import time
+
+import numpy as np
+from sklearn.base import clone
+
+from resource_sampler import ResourceSampler
+
+
+def geometric_sizes(n_max, n_min=1000, factor=2):
+    """n_min, n_min * factor, ... up to and including `n_max`."""
+    sizes = []
+    size = min(n_min, n_max)
+    while size < n_max:
+        sizes.append(int(size))
+        size *= factor
+    sizes.append(int(n_max))
+    return sizes
+
+
+def _subset(X, y, size, axis):
+    if axis == "samples":
+        return X.iloc[:size], y.iloc[:size]
+    if axis == "features":
+        return X.iloc[:, :size], y
+    raise ValueError("axis must be 'samples' or 'features', got %r" % axis)
+
+
+def _measure_fit(estimator, X, y, interval, phase_name):
+    timed = clone(estimator)
+    start = time.perf_counter()
+    timed.fit(X, y)
+    fit_time = time.perf_counter() - start
+
+    traced = clone(estimator)
+    with ResourceSampler(interval=interval) as sampler, sampler.phase(phase_name):
+        traced.fit(X, y)
+    # Memory still traced when the phase started (e.g. from the sampler itself) is not the fit's
+    traced_at_start = sampler.series(phase_name)["traced"][0]
+    return {
+        "fit_time": fit_time,
+        "peak_memory": int(sampler.phases[phase_name]["traced_peak"] - traced_at_start),
+        "model_size": len(pickle.dumps(timed, protocol=pickle.HIGHEST_PROTOCOL)),
+    }
+
+
+def fit_scaling(estimator, X, y, sizes=None, axis="samples", interval=0.005):
+    """
+    Fit clones of `estimator` on growing subsets of `X` (a DataFrame) and `y`.
+
+    Parameters
+    ----------
+    sizes : number of rows (or columns) of every subset, defaults to `geometric_sizes`
+    axis : "samples" to grow the first rows, "features" to grow the first columns
+    interval : seconds between two background samples while memory is traced
+
+    Returns
+    -------
+    scaling : dict of `np.array`s "sizes", "fit_time" (seconds), "peak_memory" (peak
+    bytes allocated by `fit`) and "model_size" (bytes), one entry per size
+
+    """
+    n_max = X.shape[1] if axis == "features" else X.shape[0]
+    if sizes is None:
+        sizes = geometric_sizes(n_max, n_min=1000 if axis == "samples" else 1)
+
+    # An untimed fit first, so imports and first-call set-up do not land on the smallest size.
+    clone(estimator).fit(*_subset(X, y, sizes[0], axis))
+
+    rows = []
+    for size in sizes:
+        X_subset, y_subset = _subset(X, y, size, axis)
+        rows.append(_measure_fit(estimator, X_subset, y_subset, interval, "%s=%d" % (axis, size)))
+
+    return {
+        "sizes": np.array(sizes),
+        **{key: np.array([row[key] for row in rows]) for key in ("fit_time", "peak_memory", "model_size")},
+    }
+
+
+def complexity_exponent(sizes, costs):
+    """
+    Fit `costs = a * sizes ** k` by least squares on a log-log scale.
+
+    Returns
+    -------
+    k, a : the empirical complexity exponent and the constant factor, both `nan` when
+    fewer than two sizes have a positive cost
+
+    """
+    sizes = np.asarray(sizes, dtype=float)
+    costs = np.asarray(costs, dtype=float)
+    # Sizes whose cost is too small to measure carry no information on a log scale.
+    measured = costs > 0
+    if np.count_nonzero(measured) < 2:
+        return np.nan, np.nan
+    k, log_a = np.polyfit(np.log(sizes[measured]), np.log(costs[measured]), 1)
+    return k, np.exp(log_a)
+
+
+def extrapolate(sizes, costs, size):
+    """Predicted cost at `size` from `complexity_exponent`."""
+    k, a = complexity_exponent(sizes, costs)
+    return a * size**k
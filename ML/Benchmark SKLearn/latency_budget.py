@@ -0,0 +1,169 @@
+"""
+Latency-budgeted model selection for `DecisionTreeClassifier`.
+
+`evaluate_sklearn_batch_processing.py` measures accuracy and `benchmark_sklearn_prediction.py`
+measures latency; this module connects the two. `search` trains candidate trees over a grid
+of `max_depth`, `min_samples_leaf` and cost-complexity pruning (`ccp_alpha`) values,
+measures each candidate's validation accuracy and single-row p99 prediction latency, and
+returns the accuracy/latency Pareto frontier together with the most accurate candidate
+that meets the latency budget.
+
+Candidates are fitted lazily, in order of increasing `max_depth`. The length of the
+root-to-leaf path is what single-row traversal pays for, so once a tree of depth d misses
+the budget (confirmed by a second measurement, so one noisy p99 does not prune the rest of
+the grid), a candidate whose fitted depth turns out to be at least d is not benchmarked.
+`max_depth` only bounds the depth from above, and a larger `min_samples_leaf` or
+`ccp_alpha` can keep a tree far shallower, so a candidate is only skipped without being
+fitted when it is at least as complex as an over-budget one in every parameter: a
+`max_depth` at least as large and a `min_samples_leaf` and `ccp_alpha` at most as large.
+Only the best estimator is kept in memory.
+
+Usage:
+
+    python "ML/Benchmark SKLearn/latency_budget.py" --budget-us 150
+"""
+import argparse
+import itertools
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+from benchmark_sklearn_prediction import atomic_benchmark_estimator
+from feature_pipeline import load_features
+from latency_histogram import LatencyHistogram, required_samples
+
+DEFAULT_GRID = {
+    "max_depth": [2, 4, 6, 8, 12, 16, None],
+    "min_samples_leaf": [1, 10, 100],
+    # Number of ccp_alpha values taken from the cost-complexity pruning path
+    "n_ccp_alphas": 4,
+}
+
+
+def ccp_alpha_candidates(X_train, y_train, n_alphas, random_state=42):
+    """Pick `n_alphas` values spread over the cost-complexity pruning path, including 0."""
+    path = DecisionTreeClassifier(random_state=random_state).cost_complexity_pruning_path(X_train, y_train)
+    alphas = np.unique(path.ccp_alphas[:-1])  # The last alpha prunes the tree to its root
+    if len(alphas) == 0:
+        return [0.0]
+    quantiles = np.linspace(0, 0.99, n_alphas)
+    return sorted({0.0, *np.quantile(alphas, quantiles).tolist()})
+
+
+def pareto_frontier(candidates):
+    """Candidates that no other candidate beats on both p99 latency and accuracy."""
+    frontier = []
+    best_accuracy = -np.inf
+    for candidate in sorted(candidates, key=lambda c: (c["p99"], -c["accuracy"])):
+        if candidate["accuracy"] > best_accuracy:
+            frontier.append(candidate)
+            best_accuracy = candidate["accuracy"]
+    return frontier
+
+
+def _p99(clf, X_val, n_samples, input_format):
+    runtimes = atomic_benchmark_estimator(clf, X_val, sample_size=n_samples, input_format=input_format)
+    return LatencyHistogram.from_samples(runtimes).percentile(99)
+
+
+def _at_least_as_complex(params, other):
+    """Whether a tree fitted with `params` grows at least as deep as one fitted with `other`."""
+    def depth_bound(max_depth):
+        return np.inf if max_depth is None else max_depth
+
+    return (
+        depth_bound(params["max_depth"]) >= depth_bound(other["max_depth"])
+        and params["min_samples_leaf"] <= other["min_samples_leaf"]
+        and params["ccp_alpha"] <= other["ccp_alpha"]
+    )
+
+
+def search(X_train, y_train, X_val, y_val, budget_p99, grid=DEFAULT_GRID, input_format="dataframe", random_state=42):
+    """
+    Search for the most accurate tree whose single-row p99 latency is within `budget_p99`.
+
+    Parameters
+    ----------
+    X_train, y_train : data the candidates are fitted on
+    X_val, y_val : data accuracy and latency are measured on
+    budget_p99 : latency budget for single-row predictions, in seconds
+    grid : dict with "max_depth" and "min_samples_leaf" lists and "n_ccp_alphas"
+    input_format : how rows are passed to `predict()`, see `INPUT_FORMATS`
+
+    Returns
+    -------
+    best : the most accurate candidate within budget, with its fitted "estimator", or None
+    frontier : the Pareto frontier of all benchmarked candidates
+    candidates : every candidate, as dicts of params, depth and node count (None when not
+        fitted), accuracy and p99 (None when not benchmarked) and status
+
+    """
+    ccp_alphas = ccp_alpha_candidates(X_train, y_train, grid["n_ccp_alphas"], random_state)
+    # Shallowest trees first; None (unlimited depth) comes last.
+    max_depths = sorted(grid["max_depth"], key=lambda depth: np.inf if depth is None else depth)
+
+    n_samples = required_samples(0.99)
+    violating_depth = np.inf
+    violating_params = []
+    candidates = []
+    best, best_estimator = None, None
+    for max_depth, min_samples_leaf, ccp_alpha in itertools.product(max_depths, grid["min_samples_leaf"], ccp_alphas):
+        params = {"max_depth": max_depth, "min_samples_leaf": min_samples_leaf, "ccp_alpha": ccp_alpha}
+        candidate = {**params, "depth": None, "node_count": None, "accuracy": None, "p99": None, "status": "pruned"}
+        candidates.append(candidate)
+        if any(_at_least_as_complex(params, violating) for violating in violating_params):
+            continue
+
+        clf = DecisionTreeClassifier(random_state=random_state, **params).fit(X_train, y_train)
+        candidate["depth"], candidate["node_count"] = clf.tree_.max_depth, clf.tree_.node_count
+        if candidate["depth"] >= violating_depth:
+            continue
+
+        candidate["accuracy"] = accuracy_score(y_val, clf.predict(X_val))
+        candidate["p99"] = _p99(clf, X_val, n_samples, input_format)
+        if candidate["p99"] > budget_p99:
+            # Confirm with a second measurement before pruning everything at least this deep.
+            candidate["p99"] = min(candidate["p99"], _p99(clf, X_val, n_samples, input_format))
+        if candidate["p99"] <= budget_p99:
+            candidate["status"] = "within budget"
+            if best is None or (candidate["accuracy"], -candidate["p99"]) > (best["accuracy"], -best["p99"]):
+                best, best_estimator = candidate, clf
+        else:
+            candidate["status"] = "over budget"
+            violating_depth = min(violating_depth, candidate["depth"])
+            violating_params.append(params)
+
+    benchmarked = [candidate for candidate in candidates if candidate["p99"] is not None]
+    if best is not None:
+        best = {**best, "estimator": best_estimator}
+    return best, pareto_frontier(benchmarked), candidates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find the most accurate tree within a p99 latency budget.")
+    parser.add_argument('--budget-us', type=float, required=True, help="single-row p99 budget in microseconds")
+    args = parser.parse_args(argv)
+
+    X, y = load_features()
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+    best, frontier, candidates = search(X_train, y_train, X_val, y_val, args.budget_us * 1e-6)
+
+    with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 200):
+        print(pd.DataFrame(candidates))
+        print("\nPareto frontier:")
+        print(pd.DataFrame(frontier))
+    if best is None:
+        print("\nNo candidate meets a p99 of %.1f us" % args.budget_us)
+    else:
+        print("\nBest within budget: %s (accuracy %.4f, p99 %.1f us)" % (
+            {name: best[name] for name in ("max_depth", "min_samples_leaf", "ccp_alpha")},
+            best["accuracy"],
+            1e6 * best["p99"],
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+HDR-style latency histogram.
+
+Latencies are counted in log-linear buckets over nanoseconds, in the spirit of
+HdrHistogram: values below `2 ** precision_bits` ns get one bucket each, and every
+power-of-two range above that is split into `2 ** (precision_bits - 1)` equal buckets.
+Every recorded value is therefore known to within a relative error of
+`2 ** -(precision_bits - 1)` (about 1.6% for the default of 7 bits), and the memory used
+depends only on the tracked range, not on how many samples are recorded.
+
+Histograms with the same configuration can be merged, so runs that were repeated or
+executed by parallel workers can be reported as one distribution.
+"""
+import math
+
+import numpy as np
+
+REPORTED_PERCENTILES = (50, 90, 99, 99.9)
+
+
+def required_samples(quantile=0.999, tail_samples=10):
+    """
+    Number of samples needed to see `tail_samples` values above `quantile`.
+
+    An estimate of p99.9 from 1000 samples rests on a single value; with the defaults
+    10000 samples put ten values in the tail.
+    """
+    return int(math.ceil(tail_samples / (1.0 - quantile)))
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram with constant memory.
+
+    Parameters
+    ----------
+    highest_ns : largest trackable latency in nanoseconds, larger values are clamped
+    precision_bits : log2 of the number of linear buckets per power of two (times two)
+
+    """
+
+    def __init__(self, highest_ns=3600 * 10**9, precision_bits=7):
+        self.highest_ns = int(highest_ns)
+        self.precision_bits = precision_bits
+        self.counts = np.zeros(self._index(self.highest_ns) + 1, dtype=np.int64)
+        self.total_count = 0
+        self.min_ns = None
+        self.max_ns = None
+
+    @classmethod
+    def from_samples(cls, runtimes, **kwargs):
+        """Build a histogram from an array of runtimes in seconds."""
+        histogram = cls(**kwargs)
+        histogram.record(runtimes)
+        return histogram
+
+    def _index(self, values_ns):
+        p = self.precision_bits
+        values_ns = np.asarray(values_ns, dtype=np.int64)
+        # `frexp` returns the exponent e with v = m * 2**e and 0.5 <= m < 1, i.e. the bit length.
+        bit_length = np.frexp(values_ns.astype(np.float64))[1]
+        shift = np.maximum(bit_length - p, 0)
+        sub_bucket = values_ns >> shift
+        half = 1 << (p - 1)
+        return np.where(
+            shift == 0,
+            values_ns,
+            (1 << p) + (shift - 1) * half + (sub_bucket - half),
+        )
+
+    def _upper_bound_ns(self, indices):
+        # Largest value (in ns) that falls into each bucket index.
+        p = self.precision_bits
+        half = 1 << (p - 1)
+        indices = np.asarray(indices, dtype=np.int64)
+        linear = indices < (1 << p)
+        offset = np.maximum(indices - (1 << p), 0)
+        shift = offset // half + 1
+        sub_bucket = offset % half + half
+        return np.where(linear, indices, ((sub_bucket + 1) << shift) - 1)
+
+    def record(self, runtimes):
+        """Record one runtime or an array of runtimes, in seconds."""
+        values_ns = np.clip(np.rint(np.atleast_1d(runtimes) * 1e9), 0, self.highest_ns).astype(np.int64)
+        if values_ns.size == 0:
+            return
+        np.add.at(self.counts, self._index(values_ns), 1)
+        self.total_count += values_ns.size
+        low, high = int(values_ns.min()), int(values_ns.max())
+        self.min_ns = low if self.min_ns is None else min(self.min_ns, low)
+        self.max_ns = high if self.max_ns is None else max(self.max_ns, high)
+
+    def merge(self, other):
+        """Add the counts of `other` (with the same configuration) to this histogram."""
+        if (other.highest_ns, other.precision_bits) != (self.highest_ns, self.precision_bits):
+            raise ValueError("Cannot merge histograms with different configurations")
+        self.counts += other.counts
+        self.total_count += other.total_count
+        for attr, pick in (("min_ns", min), ("max_ns", max)):
+            values = [v for v in (getattr(self, attr), getattr(other, attr)) if v is not None]
+            setattr(self, attr, pick(values) if values else None)
+        return self
+
+    def percentile(self, q):
+        """Latency in seconds at percentile `q` (0-100), as the upper bound of its bucket."""
+        if self.total_count == 0:
+            return float("nan")
+        rank = max(int(math.ceil(q / 100.0 * self.total_count)), 1)
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(int(self._upper_bound_ns(index)), self.max_ns) * 1e-9
+
+    def summary(self, percentiles=REPORTED_PERCENTILES):
+        """dict of "p50", "p90", ..., "max" latencies in seconds."""
+        summary = {"p%g" % q: self.percentile(q) for q in percentiles}
+        summary["max"] = float("nan") if self.max_ns is None else self.max_ns * 1e-9
+        return summary
+
+    def format_summary(self):
+        return ", ".join(
+            "%s=%.2fus" % (name, 1e6 * value) for name, value in self.summary().items()
+        )
@@ -0,0 +1,191 @@
+"""
+Open-loop load generator for single-row prediction latency under a target request rate.
+
+`benchmark_throughputs` and `scaling.measure_pool_throughput` are closed-loop: a worker
+only sends its next request once the previous one has returned. When a request is slow,
+the requests that should have been sent meanwhile are simply never sent, so the queueing
+delay they would have seen is missing from the measurements (coordinated omission).
+
+`run_open_loop` instead sends requests on a fixed schedule of intended send times, at a
+constant rate or as a Poisson process, no matter how many are still in flight, to a pool
+of workers that each hold the fitted estimator (shipped once through the pool
+initializer, see `scaling.py`). Every latency is measured from the request's *intended*
+send time to its completion, so time spent queued behind slow requests, and any lag of
+the sender itself, is counted.
+
+`qps_sweep` raises the offered rate until the pool saturates: it stops keeping up with
+the offered rate, or its p99 latency explodes. A single thread submits every request, so
+at high rates the sender itself (or, for a process pool, the IPC behind `submit`) can be
+what falls behind. Every run reports the sender's lag behind the schedule, and a rate at
+which it lags by a sizeable part of the mean inter-arrival time is flagged as
+generator-limited rather than reported as the estimator's saturation point.
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import numpy as np
+
+import scaling
+from latency_histogram import LatencyHistogram
+
+ARRIVAL_PROCESSES = ("constant", "poisson")
+
+
+def _predict():
+    # Runs in a worker; `scaling._init_worker` has set the estimator and row.
+    scaling._estimator.predict(scaling._X_row)
+
+
+def arrival_schedule(rate, duration_secs, process="poisson", random_state=42):
+    """
+    Intended send times, in seconds from the start of the run, of requests arriving at
+    `rate` requests/sec for `duration_secs`.
+
+    `process` is "constant" (evenly spaced) or "poisson" (exponential inter-arrival times).
+    """
+    n_requests = max(1, int(round(rate * duration_secs)))
+    if process == "constant":
+        return np.arange(n_requests) / rate
+    if process == "poisson":
+        rng = np.random.RandomState(random_state)
+        return np.cumsum(rng.exponential(1.0 / rate, size=n_requests))
+    raise ValueError("Unknown arrival process %r, expected one of %s" % (process, ARRIVAL_PROCESSES))
+
+
+def _send(executor, schedule, latencies):
+    """
+    Submit one request per entry of `schedule` at its intended time.
+
+    Returns the start time, the futures and the lag of every submission behind its
+    intended time, measured once `submit` has returned.
+    """
+
+    def on_done(i, intended):
+        def record(future):
+            latencies[i] = time.perf_counter() - intended
+
+        return record
+
+    futures = []
+    send_lags = np.zeros(len(schedule))
+    start = time.perf_counter() + 0.05
+    for i, offset in enumerate(schedule):
+        intended = start + offset
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        future = executor.submit(_predict)
+        send_lags[i] = max(0.0, time.perf_counter() - intended)
+        future.add_done_callback(on_done(i, intended))
+        futures.append(future)
+    return start, futures, send_lags
+
+
+def run_open_loop(
+    estimator, X_row, rate, n_workers=1, kind="process", process="poisson", duration_secs=2.0, max_send_lag_ratio=0.5
+):
+    """
+    Offer `rate` single-row predictions per second to a pool of `n_workers` workers.
+
+    Parameters
+    ----------
+    max_send_lag_ratio : the run is generator-limited when the p99 lag of the submissions
+        behind their schedule exceeds this fraction of the mean inter-arrival time `1 / rate`
+
+    Returns
+    -------
+    result : dict with the offered "rate", the "achieved" rate (completed requests/sec
+    over the whole run), the per-request "latencies" in seconds measured from the
+    intended send time, their `LatencyHistogram`, "send_lag", the p99 delay in seconds of a
+    submission behind its schedule, and "generator_limited"
+
+    """
+    executor_cls = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}[kind]
+    schedule = arrival_schedule(rate, duration_secs, process)
+    latencies = np.full(len(schedule), np.nan)
+    with executor_cls(
+        max_workers=n_workers, initializer=scaling._init_worker, initargs=(estimator, X_row)
+    ) as executor:
+        list(executor.map(scaling._warmup, [10] * n_workers))
+        start, futures, send_lags = _send(executor, schedule, latencies)
+        wait(futures)
+        # Callbacks of the last futures may run just after `wait` returns.
+        while np.isnan(latencies).any():
+            time.sleep(0.001)
+        end = time.perf_counter()
+    send_lag = np.percentile(send_lags, 99)
+    return {
+        "rate": rate,
+        "achieved": len(schedule) / (end - start),
+        "latencies": latencies,
+        "histogram": LatencyHistogram.from_samples(latencies),
+        "send_lag": send_lag,
+        "generator_limited": send_lag > max_send_lag_ratio / rate,
+    }
+
+
+def qps_sweep(
+    estimator,
+    X_row,
+    rates=None,
+    n_workers=1,
+    kind="process",
+    process="poisson",
+    duration_secs=2.0,
+    min_achieved_ratio=0.95,
+    max_p99_growth=10.0,
+    max_send_lag_ratio=0.5,
+):
+    """
+    Run `run_open_loop` at increasing rates until the pool saturates.
+
+    Parameters
+    ----------
+    rates : offered rates in requests/sec, in increasing order. By default they are
+        fractions (10% to 150%) of the pool's closed-loop throughput.
+    min_achieved_ratio : a rate is saturated when less than this fraction of it is served
+    max_p99_growth : a rate is also saturated when its p99 latency exceeds this multiple
+        of the p99 at the lowest rate
+    max_send_lag_ratio : see `run_open_loop`. The sweep stops at the first
+        generator-limited rate without counting it as saturated: the sender, not the
+        estimator, could not keep up
+
+    Returns
+    -------
+    sweep : dict with the per-rate "results" (see `run_open_loop`, without the raw
+    latencies), "saturated_at" (the first saturated rate, or None),
+    "generator_limited_at" (the first generator-limited rate, or None) and
+    "max_sustainable" (the highest rate served before either, or None)
+
+    """
+    if rates is None:
+        capacity = scaling.measure_pool_throughput(estimator, X_row, n_workers, kind, duration_secs=0.5)
+        rates = capacity * np.array([0.1, 0.25, 0.5, 0.75, 0.9, 1.0, 1.1, 1.25, 1.5])
+
+    results = []
+    saturated_at = None
+    generator_limited_at = None
+    max_sustainable = None
+    baseline_p99 = None
+    for rate in rates:
+        result = run_open_loop(estimator, X_row, rate, n_workers, kind, process, duration_secs, max_send_lag_ratio)
+        del result["latencies"]
+        results.append(result)
+        if result["generator_limited"]:
+            # The latencies include the sender's own backlog, so they say nothing about
+            # the estimator, at this rate or any higher one.
+            generator_limited_at = rate
+            break
+        p99 = result["histogram"].percentile(99)
+        baseline_p99 = baseline_p99 or p99
+        if result["achieved"] < min_achieved_ratio * rate or p99 > max_p99_growth * baseline_p99:
+            saturated_at = rate
+            # Past saturation the queue only grows; higher rates tell us nothing more.
+            break
+        max_sustainable = rate
+    return {
+        "results": results,
+        "saturated_at": saturated_at,
+        "generator_limited_at": generator_limited_at,
+        "max_sustainable": max_sustainable,
+    }
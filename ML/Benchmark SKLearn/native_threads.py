@@ -0,0 +1,51 @@
+"""
+Control of the native thread pools and CPU affinity the benchmark runs with.
+
+NumPy's BLAS (OpenBLAS or MKL) and scikit-learn's OpenMP code start one thread per core by
+default. In a serving host that already runs one worker process per core, those pools
+oversubscribe the CPUs, and for single-row predictions the thread start-up and
+synchronisation cost more than the work they split. `native_thread_limit` caps every
+native pool through `threadpoolctl` (a scikit-learn dependency), and `pinned` restricts
+the process to a set of cores with `os.sched_setaffinity` where the platform has it.
+"""
+import os
+from contextlib import contextmanager
+
+from threadpoolctl import threadpool_info, threadpool_limits
+
+
+def available_cpus():
+    """Cores this process may run on (all cores where affinity is not supported)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count()))
+
+
+def native_pools():
+    """One (library, threading API, number of threads) tuple per loaded native pool."""
+    return [(pool["internal_api"], pool["user_api"], pool["num_threads"]) for pool in threadpool_info()]
+
+
+@contextmanager
+def native_thread_limit(n_threads):
+    """Limit every BLAS and OpenMP pool to `n_threads` threads inside the block."""
+    with threadpool_limits(limits=n_threads):
+        yield
+
+
+@contextmanager
+def pinned(cpus):
+    """
+    Run the block with the process pinned to `cpus`, restoring the affinity afterwards.
+
+    Does nothing when `cpus` is None or the platform has no `os.sched_setaffinity`.
+    """
+    if cpus is None or not hasattr(os, "sched_setaffinity"):
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, cpus)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
@@ -0,0 +1,148 @@
+"""
+Single-row feature encoding for serving.
+
+`feature_pipeline.build_features` is built for whole files: tags go through categorical
+codes and vocabularies merged across chunks, and dates through `pd.to_datetime`. Applying
+that to one incoming request costs far more than the model's own `predict`.
+`OnlineEncoder` is built from the vocabularies the fitted pipeline stored in its cache and
+encodes one raw record (a mapping of raw CSV column names to values) with:
+
+- one dict lookup per tag, mapping the raw tag to the code the batch pipeline gives it.
+  Missing tags get the code of 'unknown', like the batch pipeline; tags that were never
+  seen in training go to an extra unknown bucket, one past the last code,
+- the year sliced straight out of the fixed-format date string (`DATE_FORMAT`), falling
+  back to `strptime` only for strings that are not zero-padded,
+- a plain `float()` for the numeric columns,
+
+written into an output row that is allocated once and reused by every call.
+
+The encoder is exported to and loaded from a small JSON file, so a serving process does
+not need the CSV or the feature cache.
+"""
+import json
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from feature_pipeline import (
+    DATE_COLUMNS,
+    DATE_FORMAT,
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CSV_PATH,
+    FEATURE_COLUMNS,
+    NUMERIC_COLUMNS,
+    TAG_COLUMNS,
+    TARGET_COLUMN,
+    load_vocabularies,
+)
+
+# Raw columns a record needs to be encoded, in the order they are read from the CSV.
+RAW_COLUMNS = [*NUMERIC_COLUMNS, *DATE_COLUMNS, *TAG_COLUMNS]
+
+
+def _is_missing(value):
+    return value is None or value == '' or (isinstance(value, float) and math.isnan(value))
+
+
+def _year(value):
+    # DATE_FORMAT is '%m/%d/%Y %H:%M:%S', so a zero-padded date has its year at [6:10].
+    if isinstance(value, str) and len(value) == 19 and value[2] == '/' and value[5] == '/':
+        year = value[6:10]
+        if year.isdigit():
+            return float(year)
+    if _is_missing(value):
+        return math.nan
+    try:
+        return float(datetime.strptime(value, DATE_FORMAT).year)
+    except (TypeError, ValueError):
+        # The batch pipeline parses with errors='coerce'
+        return math.nan
+
+
+def _number(value):
+    return math.nan if _is_missing(value) else float(value)
+
+
+class OnlineEncoder:
+    """
+    Parameters
+    ----------
+    vocabularies : dict mapping every tag column (and optionally the target) to its
+        sorted vocabulary, as returned by `feature_pipeline.load_vocabularies`
+    dtype : dtype of the output row
+
+    """
+
+    def __init__(self, vocabularies, dtype=np.float64):
+        self.vocabularies = {column: list(vocabulary) for column, vocabulary in vocabularies.items()}
+        self.dtype = np.dtype(dtype)
+        self.classes = self.vocabularies.get(TARGET_COLUMN)
+
+        self._out = np.empty((1, len(FEATURE_COLUMNS)), dtype=self.dtype)
+        self._row = self._out[0]
+
+        # One (raw column, output slot) per feature of each kind, resolved once here
+        # instead of per call.
+        slots = {column: i for i, column in enumerate(FEATURE_COLUMNS)}
+        self._numeric = [(column, slots[column]) for column in NUMERIC_COLUMNS]
+        self._dates = [(date_column, slots[year_column]) for date_column, year_column in DATE_COLUMNS.items()]
+        self._tags = []
+        for column in TAG_COLUMNS:
+            vocabulary = self.vocabularies[column]
+            codes = {value: float(code) for code, value in enumerate(vocabulary)}
+            unknown_bucket = float(len(vocabulary))
+            missing = codes.get('unknown', unknown_bucket)
+            self._tags.append((column, slots[column], codes, missing, unknown_bucket))
+
+    @classmethod
+    def from_pipeline(cls, csv_path=DEFAULT_CSV_PATH, cache_dir=DEFAULT_CACHE_DIR, dtype=np.float64):
+        """Build the encoder from the vocabularies of the cached feature pipeline."""
+        return cls(load_vocabularies(csv_path, cache_dir), dtype=dtype)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'vocabularies': self.vocabularies, 'dtype': self.dtype.name}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            exported = json.load(f)
+        return cls(exported['vocabularies'], dtype=exported['dtype'])
+
+    def encode(self, record):
+        """
+        Encode one raw record into a `(1, n_features)` row ready for `predict`.
+
+        The returned array is the encoder's own buffer and is overwritten by the next
+        call; copy it to keep it.
+        """
+        row = self._row
+        get = record.get
+        for column, slot in self._numeric:
+            row[slot] = _number(get(column))
+        for column, slot in self._dates:
+            row[slot] = _year(get(column))
+        for column, slot, codes, missing, unknown_bucket in self._tags:
+            value = get(column)
+            code = codes.get(value)
+            if code is None:
+                code = missing if _is_missing(value) else unknown_bucket
+            row[slot] = code
+        return self._out
+
+    def decode_target(self, codes):
+        """Map encoded predictions back to the raw target labels."""
+        return [self.classes[int(code)] for code in np.ravel(codes)]
+
+
+def read_raw_records(csv_path=DEFAULT_CSV_PATH, n_rows=1000):
+    """
+    Read the first `n_rows` rows of `csv_path` as raw records, the way they would arrive
+    at serving time: dicts of unparsed strings, with '' for missing values.
+    """
+    frame = pd.read_csv(csv_path, usecols=[*RAW_COLUMNS, TARGET_COLUMN], dtype=str, keep_default_na=False, nrows=n_rows)
+    # The batch pipeline drops rows without a target
+    frame = frame[frame[TARGET_COLUMN] != '']
+    return frame[RAW_COLUMNS].to_dict('records')
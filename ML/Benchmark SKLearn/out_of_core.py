@@ -0,0 +1,160 @@
+"""
+Building blocks for out-of-core training in `evaluate_sklearn_batch_processing.py`.
+
+- `block_split` / `iter_batches` stream training batches out of the memory-mapped feature
+  cache as contiguous row ranges, so only one batch is ever copied into RAM. The cache is
+  column-major: a contiguous range of rows is one contiguous run per column on disk,
+  whereas gathering shuffled rows would touch nearly every page of every column for every
+  batch. The data is shuffled at the level of batches instead.
+- `VotingTreeEnsemble` keeps per-batch models as a majority-vote ensemble whose size is
+  bounded: once it is full, a new model only gets in by replacing the weakest member.
+- `write_shared_split` / `fit_batch` let a process pool fit batches in parallel. The
+  split is written once as `.npy` files and every worker memory-maps them in its
+  initializer, so no array is pickled per task and all workers share one page-cache copy.
+"""
+import os
+import time
+
+import numpy as np
+from sklearn.metrics import accuracy_score
+from sklearn.tree import DecisionTreeClassifier
+
+
+def block_split(n_samples, batch_size, test_size=0.2, validation_size=10000, random_state=42):
+    """
+    Split `range(n_samples)` into contiguous test and validation ranges and contiguous
+    training batches of at most `batch_size` rows, in random order.
+
+    The held-out rows are sized by rows, not by batches: the test range holds
+    `test_size * n_samples` rows and the validation range `validation_size` rows (at most
+    a tenth of the rest). Both sit next to each other at a random offset; the training
+    rows on either side are cut into batches.
+
+    Returns
+    -------
+    train_blocks, validation_block, test_blocks : lists of `(start, end)` row ranges
+    (`validation_block` is a single range)
+
+    """
+    n_test = max(1, int(round(test_size * n_samples))) if n_samples > 1 else 0
+    n_validation = min(validation_size, (n_samples - n_test) // 10)
+    n_held_out = n_test + n_validation
+    if n_held_out >= n_samples:
+        raise ValueError("No training rows left out of %d samples with test_size=%r" % (n_samples, test_size))
+
+    rng = np.random.RandomState(random_state)
+    offset = rng.randint(0, n_samples - n_held_out + 1)
+    test_blocks = [(offset, offset + n_test)] if n_test else []
+    validation_block = (offset + n_test, offset + n_held_out)
+
+    train_blocks = [
+        (start, min(start + batch_size, end))
+        for begin, end in ((0, offset), (offset + n_held_out, n_samples))
+        for start in range(begin, end, batch_size)
+    ]
+    train_blocks = [train_blocks[i] for i in rng.permutation(len(train_blocks))]
+    return train_blocks, validation_block, test_blocks
+
+
+def read_blocks(X, y, blocks):
+    """Concatenate the rows of every `(start, end)` range in `blocks` into arrays."""
+    if not blocks:
+        return np.asarray(X[:0]), np.asarray(y[:0])
+    blocks = sorted(blocks)
+    return (
+        np.concatenate([np.asarray(X[start:end]) for start, end in blocks]),
+        np.concatenate([np.asarray(y[start:end]) for start, end in blocks]),
+    )
+
+
+def iter_batches(X, y, blocks, shuffle_seed=None):
+    """
+    Yield `(X_batch, y_batch)` for every `(start, end)` row range in `blocks`.
+
+    `X` and `y` may be `np.memmap`s: every batch reads just its own contiguous rows. With
+    `shuffle_seed`, the blocks are visited in a random order.
+    """
+    if shuffle_seed is not None:
+        blocks = [blocks[i] for i in np.random.RandomState(shuffle_seed).permutation(len(blocks))]
+    for start, end in blocks:
+        yield np.array(X[start:end]), np.array(y[start:end])
+
+
+class VotingTreeEnsemble:
+    """
+    Hard-voting ensemble of at most `max_estimators` fitted classifiers.
+
+    Parameters
+    ----------
+    classes : sorted array of every class label the members may predict
+    max_estimators : upper bound on the number of members kept in memory
+
+    """
+
+    def __init__(self, classes, max_estimators=10):
+        self.classes = np.asarray(classes)
+        self.max_estimators = max_estimators
+        self.estimators = []
+        self.scores = []
+
+    def add(self, estimator, score):
+        """
+        Add a fitted estimator with its validation `score` (higher is better).
+
+        Returns whether it was kept.
+        """
+        if len(self.estimators) < self.max_estimators:
+            self.estimators.append(estimator)
+            self.scores.append(score)
+            return True
+        weakest = int(np.argmin(self.scores))
+        if score <= self.scores[weakest]:
+            return False
+        self.estimators[weakest] = estimator
+        self.scores[weakest] = score
+        return True
+
+    def predict(self, X):
+        votes = np.zeros((X.shape[0], len(self.classes)), dtype=np.int32)
+        rows = np.arange(X.shape[0])
+        for estimator in self.estimators:
+            predicted = np.searchsorted(self.classes, estimator.predict(X))
+            votes[rows, predicted] += 1
+        return self.classes[np.argmax(votes, axis=1)]
+
+
+def write_shared_split(directory, X_train, y_train, X_test, y_test):
+    """Save the train/test split as C-contiguous `.npy` files in `directory`."""
+    arrays = {"X_train": X_train, "y_train": y_train, "X_test": X_test, "y_test": y_test}
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, name + ".npy"), np.ascontiguousarray(array))
+
+
+# Memory-mapped split, opened once per worker by `init_batch_worker`.
+_split = None
+
+
+def init_batch_worker(directory):
+    global _split
+    _split = {
+        name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")
+        for name in ("X_train", "y_train", "X_test", "y_test")
+    }
+
+
+def fit_batch(start, end):
+    """
+    Fit a DecisionTreeClassifier on training rows `start:end` of the shared split and
+    evaluate it on the shared test set.
+
+    Returns
+    -------
+    training_time, accuracy
+
+    """
+    clf = DecisionTreeClassifier(random_state=42)
+    start_time = time.perf_counter()
+    clf.fit(_split["X_train"][start:end], _split["y_train"][start:end])
+    training_time = time.perf_counter() - start_time
+    accuracy = accuracy_score(_split["y_test"], clf.predict(_split["X_test"]))
+    return training_time, accuracy
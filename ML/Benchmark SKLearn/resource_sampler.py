@@ -0,0 +1,153 @@
+"""
+Low-overhead background sampler of process resources.
+
+`psutil.cpu_percent()` / `memory_profiler.memory_usage()` around a `fit` only give a
+before/after snapshot (and `memory_usage()` runs a sampling loop of its own), so the peak
+inside the call is missed. `ResourceSampler` instead runs a daemon thread that records, at
+a fixed interval, into a preallocated ring buffer:
+
+- the resident set size (RSS) of the process,
+- the CPU time (user + system) the process has used so far,
+- the memory currently traced by `tracemalloc` (Python and NumPy allocations).
+
+Any piece of code can attach to it by name with `with sampler.phase("fit"):`; on exit the
+phase gets a summary of peak/average RSS, CPU utilisation and the tracemalloc peak, and
+`sampler.series(name)` returns the samples recorded while the phase was running.
+
+Phases are meant to be sequential: the tracemalloc peak is process-wide and is reset
+when a phase starts.
+"""
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import psutil
+
+SAMPLE_DTYPE = np.dtype(
+    [("time", np.float64), ("rss", np.int64), ("cpu_time", np.float64), ("traced", np.int64)]
+)
+
+
+class ResourceSampler:
+    """
+    Parameters
+    ----------
+    interval : seconds between two samples
+    capacity : number of samples kept; older samples are overwritten
+    trace_allocations : start `tracemalloc` (if not already tracing) to record
+        Python/NumPy allocations, at the cost of slower allocations
+
+    """
+
+    def __init__(self, interval=0.01, capacity=100_000, trace_allocations=True):
+        self.interval = interval
+        self.capacity = capacity
+        self.trace_allocations = trace_allocations
+        self.samples = np.zeros(capacity, dtype=SAMPLE_DTYPE)
+        self.n_samples = 0
+        self.phases = {}
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_tracing = False
+        # The background thread and `phase` both write samples.
+        self._lock = threading.Lock()
+
+    def _sample(self):
+        cpu = self._process.cpu_times()
+        traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        rss = self._process.memory_info().rss
+        with self._lock:
+            self.samples[self.n_samples % self.capacity] = (time.perf_counter(), rss, cpu.user + cpu.system, traced)
+            self.n_samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ResourceSampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _recorded(self):
+        # Samples still in the ring buffer, oldest first.
+        if self.n_samples <= self.capacity:
+            return self.samples[: self.n_samples]
+        split = self.n_samples % self.capacity
+        return np.concatenate([self.samples[split:], self.samples[:split]])
+
+    def series(self, name):
+        """Samples recorded while phase `name` was running (as far as still buffered)."""
+        start, end = self.phases[name]["start"], self.phases[name]["end"]
+        recorded = self._recorded()
+        return recorded[(recorded["time"] >= start) & (recorded["time"] <= end)]
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Attribute everything sampled inside the block to phase `name`.
+
+        A sample is also taken synchronously at entry and exit, so even phases shorter
+        than `interval` get a summary.
+        """
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        self._sample()
+        try:
+            yield self
+        finally:
+            self._sample()
+            end = time.perf_counter()
+            traced_peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+            self.phases[name] = {"start": start, "end": end}
+            self.phases[name].update(self._summarise(self.series(name), end - start, traced_peak))
+
+    def _summarise(self, samples, duration, traced_peak):
+        rss = samples["rss"]
+        cpu_time = samples["cpu_time"][-1] - samples["cpu_time"][0] if len(samples) > 1 else 0.0
+        return {
+            "duration": duration,
+            "n_samples": len(samples),
+            "rss_peak": int(rss.max()) if len(rss) else 0,
+            "rss_mean": float(rss.mean()) if len(rss) else 0.0,
+            "rss_delta": int(rss[-1] - rss[0]) if len(rss) else 0,
+            "cpu_percent": 100.0 * cpu_time / duration if duration > 0 else 0.0,
+            "traced_peak": int(traced_peak),
+        }
+
+    def format_phase(self, name):
+        summary = self.phases[name]
+        return (
+            "%s: %.4fs, CPU %.0f%%, RSS peak %.2f MiB (mean %.2f MiB), traced peak %.2f MiB"
+            % (
+                name,
+                summary["duration"],
+                summary["cpu_percent"],
+                summary["rss_peak"] / 2**20,
+                summary["rss_mean"] / 2**20,
+                summary["traced_peak"] / 2**20,
+            )
+        )
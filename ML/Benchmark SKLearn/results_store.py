@@ -0,0 +1,205 @@
+"""
+Append-only store of benchmark runs, with baseline comparison for regression gating.
+
+Every run of `benchmark_sklearn_prediction.py` appends one JSON line to the results file
+holding the raw per-estimator atomic/bulk samples, the throughput and a fingerprint of
+the environment it ran in (CPU, core count, library versions, BLAS threads, dataset hash).
+
+Comparing two runs uses a one-sided Mann-Whitney U test per estimator and mode, since
+latency samples are far from normally distributed. A latency regression is a change that
+is both significant (p < alpha) and large enough to matter (median slower by more than
+`min_slowdown`). Run as a script to gate an upgrade on it:
+
+    python "ML/Benchmark SKLearn/results_store.py" compare --baseline <run_id>
+
+exits with status 1 when the candidate run (default: the latest one) regressed.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import scipy
+import sklearn
+from scipy.stats import mannwhitneyu
+
+DEFAULT_RESULTS_PATH = 'ML/assets/benchmark_results.jsonl'
+
+
+def _cpu_model():
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _blas_threads():
+    try:
+        from threadpoolctl import threadpool_info
+    except ImportError:
+        return None
+    return [
+        {'internal_api': pool['internal_api'], 'num_threads': pool['num_threads']}
+        for pool in threadpool_info()
+    ]
+
+
+def environment_fingerprint(dataset_hash=None):
+    """Describe the machine and libraries a run was measured on."""
+    return {
+        'cpu_model': _cpu_model(),
+        'cpu_count': os.cpu_count(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'scipy': scipy.__version__,
+        'sklearn': sklearn.__version__,
+        'blas_threads': _blas_threads(),
+        'dataset_sha256': dataset_hash,
+    }
+
+
+def record_run(stats, throughputs=None, dataset_hash=None, path=DEFAULT_RESULTS_PATH, label=None):
+    """
+    Append one benchmark run to the results file and return its entry.
+
+    Parameters
+    ----------
+    stats : dict mapping estimator names to {"atomic": runtimes, "bulk": runtimes},
+        as returned by `benchmark()`
+    throughputs : dict mapping estimator names to predictions/sec, as returned by
+        `benchmark_throughputs()`
+    dataset_hash : hash of the dataset the run used
+    label : free-form description of the run, e.g. "sklearn 1.5 upgrade"
+
+    """
+    throughputs = throughputs or {}
+    entry = {
+        'run_id': uuid.uuid4().hex[:12],
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'label': label,
+        'environment': environment_fingerprint(dataset_hash),
+        'estimators': {
+            name: {
+                'atomic': np.asarray(estimator_stats['atomic']).tolist(),
+                'bulk': np.asarray(estimator_stats['bulk']).tolist(),
+                'throughput': throughputs.get(name),
+            }
+            for name, estimator_stats in stats.items()
+        },
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    # One line per run, opened in append mode: earlier runs are never rewritten.
+    with open(path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+    return entry
+
+
+def load_runs(path=DEFAULT_RESULTS_PATH):
+    """Return every stored run, oldest first."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_run(runs, run_id):
+    for run in runs:
+        if run['run_id'] == run_id:
+            return run
+    raise KeyError("No run with id %r" % run_id)
+
+
+def compare_runs(baseline, candidate, alpha=0.01, min_slowdown=0.05):
+    """
+    Compare the latency samples of `candidate` against `baseline`.
+
+    Returns
+    -------
+    rows : list of dicts, one per (estimator, mode) present in both runs, with the
+    baseline and candidate medians, their ratio, the p-value of "candidate is slower"
+    and whether that counts as a regression.
+
+    """
+    rows = []
+    for name, baseline_stats in baseline['estimators'].items():
+        candidate_stats = candidate['estimators'].get(name)
+        if candidate_stats is None:
+            continue
+        for mode in ('atomic', 'bulk'):
+            before = np.asarray(baseline_stats[mode])
+            after = np.asarray(candidate_stats[mode])
+            ratio = np.median(after) / np.median(before)
+            p_value = mannwhitneyu(after, before, alternative='greater').pvalue
+            rows.append(
+                {
+                    'estimator': name,
+                    'mode': mode,
+                    'baseline_median': float(np.median(before)),
+                    'candidate_median': float(np.median(after)),
+                    'ratio': float(ratio),
+                    'p_value': float(p_value),
+                    'regression': bool(p_value < alpha and ratio > 1 + min_slowdown),
+                }
+            )
+    return rows
+
+
+def _fingerprint_differences(baseline, candidate):
+    before = baseline['environment']
+    after = candidate['environment']
+    return [key for key in before if before.get(key) != after.get(key)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare stored benchmark runs.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="list stored runs")
+    compare = subparsers.add_parser('compare', help="compare a run against a baseline")
+    compare.add_argument('--baseline', help="run id of the baseline (default: the first run)")
+    compare.add_argument('--candidate', help="run id of the new run (default: the latest run)")
+    compare.add_argument('--alpha', type=float, default=0.01)
+    compare.add_argument('--min-slowdown', type=float, default=0.05)
+    parser.add_argument('--results', default=DEFAULT_RESULTS_PATH)
+    args = parser.parse_args(argv)
+
+    runs = load_runs(args.results)
+    if args.command == 'list':
+        for run in runs:
+            print(run['run_id'], run['timestamp'], run['label'] or '', ', '.join(run['estimators']))
+        return 0
+
+    baseline = find_run(runs, args.baseline) if args.baseline else runs[0]
+    candidate = find_run(runs, args.candidate) if args.candidate else runs[-1]
+    differences = _fingerprint_differences(baseline, candidate)
+    if differences:
+        print("Environment differs in:", ', '.join(differences))
+
+    regressed = False
+    for row in compare_runs(baseline, candidate, args.alpha, args.min_slowdown):
+        regressed |= row['regression']
+        print(
+            "%s %s: %.2f us -> %.2f us (x%.3f, p=%.2g)%s"
+            % (
+                row['estimator'],
+                row['mode'],
+                1e6 * row['baseline_median'],
+                1e6 * row['candidate_median'],
+                row['ratio'],
+                row['p_value'],
+                "  REGRESSION" if row['regression'] else "",
+            )
+        )
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Multi-core throughput scaling of a fitted estimator.
+
+The same single-row prediction workload as `benchmark_throughputs` is run by 1..N
+workers at the same time, either as threads (which share the GIL) or as processes.
+
+The fitted estimator is handed to every worker once, through the pool initializer,
+and kept in a module-level global. Tasks only carry the start time and duration, so
+the model is never re-pickled per task.
+
+Every worker runs a full garbage collection while warming up, before the synchronised
+start, and only disables the collector when its measurement starts. Collecting at the
+start itself would hold the GIL inside the other threads' timed windows, and a thread
+re-enabling the collector on its way out would do so for threads still measuring, so the
+collector is turned back on once every worker has returned.
+"""
+import gc
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+# Set once per worker by `_init_worker`. Thread workers all see the same objects.
+_estimator = None
+_X_row = None
+
+
+def _init_worker(estimator, X_row):
+    global _estimator, _X_row
+    _estimator = estimator
+    _X_row = X_row
+
+
+def _warmup(n_calls=10):
+    for _ in range(n_calls):
+        _estimator.predict(_X_row)
+    gc.collect()
+    return os.getpid()
+
+
+def _predict_until(start_at, duration_secs):
+    """Wait until `start_at` (wall clock), then predict back-to-back for `duration_secs`."""
+    delay = start_at - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    n_predictions = 0
+    # Re-enabled by `measure_pool_throughput` once every worker is done
+    gc.disable()
+    start = time.perf_counter()
+    while (time.perf_counter() - start) < duration_secs:
+        _estimator.predict(_X_row)
+        n_predictions += 1
+    elapsed = time.perf_counter() - start
+    return n_predictions / elapsed
+
+
+def measure_pool_throughput(estimator, X_row, n_workers, kind="process", duration_secs=0.5):
+    """
+    Aggregate predictions/sec of `n_workers` workers predicting `X_row` concurrently.
+
+    Parameters
+    ----------
+    estimator : already trained estimator supporting `predict()`
+    X_row : the input passed to every `predict()` call
+    n_workers : number of concurrent workers
+    kind : 'thread' or 'process'
+    duration_secs : how long every worker keeps predicting
+
+    """
+    executor_cls = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}[kind]
+    # Thread workers disable the collector of this process; process workers exit with the pool.
+    gc_was_enabled = gc.isenabled()
+    with executor_cls(
+        max_workers=n_workers, initializer=_init_worker, initargs=(estimator, X_row)
+    ) as executor:
+        # Make sure every worker is up, warm and collected before the clock starts.
+        list(executor.map(_warmup, [10] * n_workers))
+        start_at = time.time() + 0.2
+        futures = [
+            executor.submit(_predict_until, start_at, duration_secs)
+            for _ in range(n_workers)
+        ]
+        try:
+            return sum(future.result() for future in futures)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+
+def throughput_scaling(estimator, X_row, worker_counts, kind="process", duration_secs=0.5):
+    """
+    Measure throughput for every worker count in `worker_counts`.
+
+    Returns
+    -------
+    scaling : dict with `np.array`s "workers", "throughput" (aggregate predictions/sec)
+    and "efficiency" (throughput / (workers * single-worker throughput)).
+
+    """
+    worker_counts = np.array(worker_counts)
+    throughput = np.array(
+        [
+            measure_pool_throughput(estimator, X_row, n_workers, kind, duration_secs)
+            for n_workers in worker_counts
+        ]
+    )
+    baseline = throughput[0] / worker_counts[0]
+    return {
+        "workers": worker_counts,
+        "throughput": throughput,
+        "efficiency": throughput / (worker_counts * baseline),
+    }
@@ -0,0 +1,189 @@
+"""
+Shared timing engine for the prediction benchmarks.
+
+`time.time()` has a resolution of roughly a microsecond on Linux (and much worse on
+some platforms), while a single-row `DecisionTreeClassifier.predict` takes only a few
+tens of microseconds. Measuring that with wall-clock time mostly measures jitter.
+
+This module times everything with `time.perf_counter_ns()` and:
+
+- runs a few warm-up calls first so caches, lazy imports and allocator pools are hot,
+- calibrates the cost of the timer itself (and of the Python loop around the call)
+  and subtracts it from every sample,
+- keeps the garbage collector disabled inside timed regions so a random collection
+  does not land inside one sample,
+- keeps adding repeats until the median is statistically stable (or a cap is hit).
+"""
+import gc
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+@contextmanager
+def gc_disabled():
+    """Disable the garbage collector for the duration of the block."""
+    was_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _noop():
+    pass
+
+
+def calibrate_overhead_ns(n_samples=10000):
+    """
+    Measure the fixed cost of one timed call, in nanoseconds.
+
+    This is a pair of `perf_counter_ns()` calls around a no-op function call, i.e.
+    everything a timed sample pays for apart from the work itself. The median is used
+    so that an occasional context switch does not inflate the estimate.
+    """
+    samples = np.empty(n_samples, dtype=np.int64)
+    with gc_disabled():
+        for i in range(n_samples):
+            start = time.perf_counter_ns()
+            _noop()
+            samples[i] = time.perf_counter_ns() - start
+    return float(np.median(samples))
+
+
+def calibrate_loop_overhead_ns(duration_ns=20_000_000):
+    """
+    Measure the per-iteration cost of the timed `while` loop used by `throughput`, in nanoseconds.
+
+    The loop has exactly the same shape as the real one (a `perf_counter_ns()` check, a
+    call and a counter increment), only the call is a no-op.
+    """
+    with gc_disabled():
+        n_calls = 0
+        start = time.perf_counter_ns()
+        while (time.perf_counter_ns() - start) < duration_ns:
+            _noop()
+            n_calls += 1
+        elapsed = time.perf_counter_ns() - start
+    return elapsed / max(n_calls, 1)
+
+
+def _relative_error_of_median(samples):
+    # Asymptotic standard error of the median is sqrt(pi / 2) * std / sqrt(n).
+    median = np.median(samples)
+    if median <= 0:
+        return np.inf
+    return 1.2533 * np.std(samples) / np.sqrt(len(samples)) / median
+
+
+class TimingEngine:
+    """
+    High-resolution, calibrated timer shared by the atomic, bulk and throughput benchmarks.
+
+    Parameters
+    ----------
+    n_warmup : number of untimed calls made before measuring
+    min_repeats : minimum number of timed samples for `repeat`
+    max_repeats : upper bound on the number of timed samples for `repeat`
+    rtol : stop adding samples once the relative standard error of the median
+        drops below this value
+    """
+
+    def __init__(self, n_warmup=10, min_repeats=10, max_repeats=1000, rtol=0.01):
+        self.n_warmup = n_warmup
+        self.min_repeats = min_repeats
+        self.max_repeats = max_repeats
+        self.rtol = rtol
+        self.overhead_ns = calibrate_overhead_ns()
+        self.loop_overhead_ns = calibrate_loop_overhead_ns()
+
+    def warmup(self, func, *args):
+        for _ in range(self.n_warmup):
+            func(*args)
+
+    def time_call(self, func, *args):
+        """Time a single call and return the overhead-corrected duration in seconds."""
+        start = time.perf_counter_ns()
+        func(*args)
+        elapsed = time.perf_counter_ns() - start
+        return max(elapsed - self.overhead_ns, 0.0) * 1e-9
+
+    def time_each(self, func, args_list):
+        """
+        Time `func(*args)` once for every `args` in `args_list`.
+
+        Returns an `np.array` of per-call runtimes in seconds, in the order of `args_list`.
+        """
+        runtimes = np.zeros(len(args_list), dtype=float)
+        if len(args_list) > 0:
+            self.warmup(func, *args_list[0])
+        with gc_disabled():
+            for i, args in enumerate(args_list):
+                runtimes[i] = self.time_call(func, *args)
+        return runtimes
+
+    def repeat(self, func, *args, min_repeats=None):
+        """
+        Time `func(*args)` repeatedly until the median runtime is stable.
+
+        At least `min_repeats` (default `self.min_repeats`) samples are taken; more are
+        added until the relative standard error of the median is below `rtol` or
+        `max_repeats` samples have been collected.
+
+        Returns an `np.array` of per-call runtimes in seconds.
+        """
+        min_repeats = self.min_repeats if min_repeats is None else min_repeats
+        max_repeats = max(self.max_repeats, min_repeats)
+        self.warmup(func, *args)
+        runtimes = []
+        with gc_disabled():
+            while len(runtimes) < max_repeats:
+                runtimes.append(self.time_call(func, *args))
+                if (
+                    len(runtimes) >= min_repeats
+                    and _relative_error_of_median(runtimes) < self.rtol
+                ):
+                    break
+        return np.array(runtimes, dtype=float)
+
+    def throughput(self, func, *args, duration_secs=0.1, max_rounds=10):
+        """
+        Count how many back-to-back calls of `func(*args)` fit in `duration_secs`.
+
+        The loop overhead is subtracted from the elapsed time, and rounds are repeated
+        (up to `max_rounds`) until two consecutive rounds agree to within `rtol`.
+
+        Returns the median throughput over the rounds, in calls per second.
+        """
+        duration_ns = duration_secs * 1e9
+        self.warmup(func, *args)
+        rates = []
+        with gc_disabled():
+            for _ in range(max_rounds):
+                n_calls = 0
+                start = time.perf_counter_ns()
+                while (time.perf_counter_ns() - start) < duration_ns:
+                    func(*args)
+                    n_calls += 1
+                elapsed = time.perf_counter_ns() - start
+                # Each iteration also paid for a `perf_counter_ns()` check and the loop itself.
+                corrected = elapsed - n_calls * self.loop_overhead_ns
+                rates.append(n_calls / max(corrected, 1.0) * 1e9)
+                if len(rates) >= 2 and abs(rates[-1] - rates[-2]) / rates[-2] < self.rtol:
+                    break
+        return float(np.median(rates))
+
+
+_default_engine = None
+
+
+def default_engine():
+    """Return a process-wide `TimingEngine`, so calibration only happens once per run."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = TimingEngine()
+    return _default_engine
@@ -0,0 +1,188 @@
+"""
+Vectorised NumPy inference for fitted `DecisionTreeClassifier` models.
+
+`CompiledTree` flattens the arrays of a fitted `clf.tree_` into a compact layout:
+
+- nodes are renumbered in breadth-first order, so every level of the tree is one
+  contiguous block and the nodes visited together sit next to each other in memory,
+- both children of a node live in a single `(n_nodes, 2)` int32 array, so the next node is
+  `children[node, go_right]` instead of a branch between two arrays,
+- every leaf stores the predicted class directly instead of its class counts.
+
+Prediction walks all rows of a batch through the tree one level at a time: each step is a
+handful of NumPy gathers and comparisons over the rows that have not reached a leaf yet.
+A single row is walked with plain Python lists instead, which is far cheaper than a
+NumPy call per level.
+
+`CompiledDecisionTreeClassifier` is a `DecisionTreeClassifier` whose `predict` uses the
+compiled tree, so it can be put straight into `configuration["estimators"]` or passed to
+`benchmark_estimator`.
+"""
+import json
+import os
+from collections import deque
+
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+# Marker used by scikit-learn for "no child" in `children_left` / `children_right`.
+TREE_LEAF = -1
+
+# What `CompiledTree.save` writes: the node arrays, and the scalars in meta.json.
+ARRAY_NAMES = ("is_leaf", "feature", "threshold", "children", "missing_go_right", "leaf_class")
+META_NAMES = ("n_features", "max_depth", "node_count")
+
+
+class CompiledTree:
+    """
+    Flattened, breadth-first copy of a fitted single-output decision tree classifier.
+
+    Parameters
+    ----------
+    clf : a fitted `DecisionTreeClassifier`
+
+    """
+
+    def __init__(self, clf):
+        tree = clf.tree_
+        if tree.n_outputs != 1:
+            raise ValueError("Only single-output trees can be compiled, got %d outputs" % tree.n_outputs)
+
+        # Breadth-first renumbering: `order[new_id] = old_id`.
+        order = []
+        queue = deque([0])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            if tree.children_left[node] != TREE_LEAF:
+                queue.append(tree.children_left[node])
+                queue.append(tree.children_right[node])
+        order = np.array(order, dtype=np.intp)
+        new_id = np.empty_like(order)
+        new_id[order] = np.arange(len(order))
+
+        is_leaf = tree.children_left[order] == TREE_LEAF
+        self.is_leaf = is_leaf
+        self.feature = np.where(is_leaf, 0, tree.feature[order]).astype(np.int32)
+        self.threshold = tree.threshold[order].astype(np.float64)
+        self.children = np.empty((len(order), 2), dtype=np.int32)
+        self.children[:, 0] = np.where(is_leaf, np.arange(len(order)), new_id[tree.children_left[order]])
+        self.children[:, 1] = np.where(is_leaf, np.arange(len(order)), new_id[tree.children_right[order]])
+        # Where a missing value goes (scikit-learn >= 1.3). Older trees never see NaN.
+        missing_go_to_left = getattr(tree, "missing_go_to_left", None)
+        if missing_go_to_left is not None:
+            self.missing_go_right = ~np.asarray(missing_go_to_left, dtype=bool)[order]
+        else:
+            self.missing_go_right = np.ones(len(order), dtype=bool)
+        self.leaf_class = clf.classes_[np.argmax(tree.value[order, 0, :], axis=1)]
+
+        self._row_tables = None
+
+        self.n_features = tree.n_features
+        self.max_depth = tree.max_depth
+        self.node_count = tree.node_count
+
+    def save(self, directory):
+        """
+        Write the node arrays as `.npy` files into `directory`.
+
+        `CompiledTree.load(directory)` memory-maps them, so every process serving the same
+        model shares a single page-cache copy of the tree.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, name + ".npy"), getattr(self, name))
+        with open(os.path.join(directory, "meta.json"), "w") as f:
+            json.dump({name: int(getattr(self, name)) for name in META_NAMES}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        """Load a tree written by `save`, memory-mapping its node arrays by default."""
+        tree = cls.__new__(cls)
+        for name in ARRAY_NAMES:
+            # `leaf_class` holds the class labels, which may be strings.
+            allow_pickle = name == "leaf_class"
+            array = np.load(
+                os.path.join(directory, name + ".npy"),
+                mmap_mode=None if allow_pickle else mmap_mode,
+                allow_pickle=allow_pickle,
+            )
+            setattr(tree, name, array)
+        with open(os.path.join(directory, "meta.json")) as f:
+            for name, value in json.load(f).items():
+                setattr(tree, name, value)
+        tree._row_tables = None
+        return tree
+
+    def _apply_row(self, row):
+        if self._row_tables is None:
+            # Plain-list copies for walking a single row, where per-level NumPy calls would
+            # cost more than the traversal itself. Built lazily, so loading a memory-mapped
+            # tree for batch prediction does not copy the node arrays.
+            self._row_tables = (
+                self.feature.tolist(),
+                self.threshold.tolist(),
+                self.children[:, 0].tolist(),
+                self.children[:, 1].tolist(),
+                self.is_leaf.tolist(),
+                self.missing_go_right.tolist(),
+            )
+        feature, threshold, left, right, is_leaf, missing_go_right = self._row_tables
+        node = 0
+        while not is_leaf[node]:
+            value = row[feature[node]]
+            if value != value:  # NaN
+                node = right[node] if missing_go_right[node] else left[node]
+            elif value <= threshold[node]:
+                node = left[node]
+            else:
+                node = right[node]
+        return node
+
+    def apply(self, X):
+        """Return the (breadth-first) id of the leaf every row of `X` ends up in."""
+        # scikit-learn compares float32 features against float64 thresholds.
+        X = np.asarray(X, dtype=np.float32)
+        n_samples = X.shape[0]
+        if n_samples == 1:
+            return np.array([self._apply_row(X[0].tolist())], dtype=np.int32)
+        leaves = np.zeros(n_samples, dtype=np.int32)
+        if self.is_leaf[0]:
+            return leaves
+
+        active = np.arange(n_samples)
+        node = np.zeros(n_samples, dtype=np.int32)
+        while active.size:
+            values = X[active, self.feature[node]]
+            go_right = values > self.threshold[node]
+            missing = np.isnan(values)
+            if missing.any():
+                go_right[missing] = self.missing_go_right[node[missing]]
+            node = self.children[node, go_right.view(np.int8)]
+
+            # Rows that reached a leaf are done, the rest go one level deeper.
+            done = self.is_leaf[node]
+            leaves[active[done]] = node[done]
+            active = active[~done]
+            node = node[~done]
+        return leaves
+
+    def predict(self, X):
+        """Predict the class of every row of `X` (array-like of shape (n_samples, n_features))."""
+        return self.leaf_class[self.apply(X)]
+
+
+class CompiledDecisionTreeClassifier(DecisionTreeClassifier):
+    """
+    `DecisionTreeClassifier` that predicts through a `CompiledTree`.
+
+    Fitting is unchanged; the tree is compiled at the end of `fit`.
+    """
+
+    def fit(self, X, y, sample_weight=None, check_input=True):
+        super().fit(X, y, sample_weight=sample_weight, check_input=check_input)
+        self.compiled_ = CompiledTree(self)
+        return self
+
+    def predict(self, X, check_input=True):
+        return self.compiled_.predict(X)
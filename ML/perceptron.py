@@ -1,6 +1,23 @@
-import numpy as np
+import itertools
+import os
+import tempfile
 import timeit
 
+import numpy as np
+from scipy import sparse
+
+
+def _as_csr(x):
+    # Convert a sparse matrix to CSR format with sorted, unique column indices per row.
+    # Weight updates index the weights with the column indices of a row, and `w[indices] += values`
+    # only applies one of several duplicate indices, so duplicates are summed up first.
+    x = x.tocsr()
+    if not x.has_canonical_format:
+        x = x.copy()
+        x.sum_duplicates()
+    return x
+
+
 class Perceptron:
     """
     A simple implementation of a perceptron, which is a type of artificial neuron used in machine learning.
@@ -26,6 +43,7 @@ class Perceptron:
         self.weights = np.zeros(input_size + 1)  # +1 for the bias term
         self.learning_rate = learning_rate  # The step size for weight updates
         self.epochs = epochs  # Number of times to iterate over the training dataset
+        self.n_chunks_seen_ = 0  # Number of chunks trained on with `partial_fit`, kept across restarts
 
     def predict(self, x):
         # Add a bias term (1) to the input vector to account for the bias weight
@@ -47,6 +65,12 @@ class Perceptron:
         # For example, a line like x + y - 5 = 0 (where the bias c = -5) can separate the two classes:
         # - Points (1, 1) and (2, 2) will be on one side of the line.
         # - Points (3, 3) and (4, 4) will be on the other side.
+        if sparse.issparse(x):
+            # A sparse sample (a 1-row CSR matrix) only stores its non-zero values and their column
+            # indices. The dot product only needs the weights of those columns, so its cost grows with
+            # the number of non-zeros instead of the number of features.
+            linear_output = x.data @ self.weights[1:][x.indices] + self.weights[0]
+            return 1 if linear_output >= 0 else 0
         x_with_bias = np.insert(x, 0, 1)
         # Calculate the linear combination of inputs and weights (dot product)
         # This represents the activation of the perceptron
@@ -71,44 +95,423 @@ class Perceptron:
         # If the result is >= 0, the perceptron outputs 1; otherwise, it outputs 0
         return 1 if linear_output >= 0 else 0
 
-    def fit(self, x, y):
+    def decision_function(self, X, chunk_size=None, out=None):
+        # Compute the linear output w . x + b for every row of the 2D array X in one vectorised pass.
+        # Instead of inserting a column of ones into X (which would copy the whole array, like
+        # `np.insert` does for a single row in `predict`), the bias is simply added after the
+        # matrix-vector product: X @ w[1:] + w[0] is the same as [1, X] @ w.
+        #
+        # Example:
+        # With weights w = [-5, 1, 1] (bias -5), the rows (1, 1) and (3, 3) give
+        # 1 + 1 - 5 = -3 and 3 + 3 - 5 = 1.
+        #
+        # `chunk_size` limits how many rows are processed at once. This allows X to be an `np.memmap`
+        # of a file larger than memory: only one chunk of rows is read at a time. `out` can be a
+        # preallocated (possibly memory-mapped) array that receives the result.
+        #
+        # X may also be a scipy.sparse matrix (e.g. CSR); the sparse matrix-vector product then only
+        # visits the stored non-zero values.
+        n_samples = X.shape[0]
+        if out is None:
+            out = np.empty(n_samples, dtype=np.result_type(X.dtype, self.weights.dtype))
+        chunk_size = chunk_size or max(n_samples, 1)
+        for start in range(0, n_samples, chunk_size):
+            if sparse.issparse(X):
+                out[start:start + chunk_size] = X[start:start + chunk_size] @ self.weights[1:]
+            else:
+                chunk = np.asarray(X[start:start + chunk_size])
+                # Writing straight into `out` avoids one temporary array per chunk
+                np.matmul(chunk, self.weights[1:], out=out[start:start + chunk_size])
+            out[start:start + chunk_size] += self.weights[0]
+        return out
+
+    def predict_batch(self, X, chunk_size=None, out=None):
+        # Predict the labels of every row of X at once, using the same step function as `predict`:
+        # 1 where the linear output is >= 0, otherwise 0.
+        # Labels are returned as int8, one byte per row instead of 8 for a Python int or int64.
+        # `chunk_size` and `out` work like in `decision_function`; `out` must then be an int8 array.
+        n_samples = X.shape[0]
+        if out is None:
+            out = np.empty(n_samples, dtype=np.int8)
+        chunk_size = chunk_size or max(n_samples, 1)
+        for start in range(0, n_samples, chunk_size):
+            scores = self.decision_function(X[start:start + chunk_size])
+            np.greater_equal(scores, 0, out=out[start:start + chunk_size], casting='unsafe')
+        return out
+
+    def fit(self, x, y, mode="per_sample", batch_size=None, early_stopping=True):
         # Train the perceptron using the provided dataset (x: inputs, y: target outputs)
-        # Iterate over the dataset for the specified number of epochs
+        # Iterate over the dataset for at most the specified number of epochs.
+        #
+        # Two training modes are available:
+        # - "per_sample" applies the perceptron learning rule after every single sample, exactly as
+        #   described in `_fit_epoch_per_sample`. The result is the same as it has always been.
+        # - "mini_batch" predicts a whole batch of `batch_size` samples at once (all of them when
+        #   `batch_size` is None) and applies the summed updates of the batch in one vectorised step.
+        #   It needs far fewer Python-level operations, but the weights follow a different path, so
+        #   the learned weights are not identical to the per-sample ones.
+        #
+        # With `early_stopping`, training stops after the first epoch in which no weight was updated:
+        # every sample was already classified correctly, and since the weights did not change, every
+        # later epoch would be exactly the same. The number of epochs actually run is stored in
+        # `self.n_epochs_`.
+        self.n_epochs_ = 0
+        for _ in range(self.epochs):
+            self.n_epochs_ += 1
+            n_updates = self._fit_epoch(x, y, mode, batch_size)
+            if early_stopping and n_updates == 0:
+                break
+        return self
+
+    def partial_fit(self, x, y, mode="per_sample", batch_size=None):
+        # Train on one chunk of a larger dataset with a single pass over it.
+        # Unlike `fit`, the full dataset never has to be in memory: calling `partial_fit` on
+        # successive chunks (x_1, y_1), (x_2, y_2), ... gives the same weights as one epoch of `fit`
+        # over all chunks concatenated, as both apply the same updates in the same order
+        # (for "mini_batch", as long as the chunk length is a multiple of `batch_size`).
+        self._fit_epoch(x, y, mode, batch_size)
+        self.n_chunks_seen_ += 1
+        return self
+
+    def fit_chunks(self, chunks, mode="per_sample", batch_size=None, checkpoint_path=None, checkpoint_every=1):
+        # Train on an iterator of (x_chunk, y_chunk) pairs, e.g. from `iter_csv_chunks`, with one
+        # `partial_fit` per chunk. Only one chunk is in memory at a time, so memory stays bounded by
+        # the chunk size however large the source is.
+        #
+        # With `checkpoint_path`, the model is saved there every `checkpoint_every` chunks. If the
+        # process is restarted, calling `fit_chunks` again with the same source and checkpoint
+        # resumes from the saved weights and skips the chunks they were already trained on.
+        if checkpoint_path is not None and os.path.exists(checkpoint_path):
+            self._load_state(checkpoint_path)
+            chunks = itertools.islice(chunks, self.n_chunks_seen_, None)
+        for x_chunk, y_chunk in chunks:
+            self.partial_fit(x_chunk, y_chunk, mode, batch_size)
+            if checkpoint_path is not None and self.n_chunks_seen_ % checkpoint_every == 0:
+                self.save(checkpoint_path)
+        if checkpoint_path is not None:
+            self.save(checkpoint_path)
+        return self
+
+    def save(self, path):
+        # Save the weights and training progress to `path` (a `.npz` file).
+        # The file is written under a temporary name first and then renamed, so a crash while saving
+        # never leaves a truncated checkpoint behind.
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    weights=self.weights,
+                    learning_rate=self.learning_rate,
+                    epochs=self.epochs,
+                    n_chunks_seen=self.n_chunks_seen_,
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        # Recreate a perceptron saved with `save`, ready to predict or to continue training
+        with np.load(path) as saved:
+            perceptron = cls(saved["weights"].shape[0] - 1, float(saved["learning_rate"]), int(saved["epochs"]))
+        perceptron._load_state(path)
+        return perceptron
+
+    def _load_state(self, path):
+        with np.load(path) as saved:
+            self.weights = saved["weights"].copy()
+            self.n_chunks_seen_ = int(saved["n_chunks_seen"])
+
+    def _fit_epoch(self, x, y, mode, batch_size):
+        if sparse.issparse(x):
+            x = _as_csr(x)
+            if mode == "per_sample":
+                return self._fit_epoch_per_sample_sparse(x, y)
+        if mode == "per_sample":
+            return self._fit_epoch_per_sample(x, y)
+        if mode == "mini_batch":
+            return self._fit_epoch_mini_batch(x, y, batch_size)
+        raise ValueError(f"mode must be 'per_sample' or 'mini_batch', got {mode!r}")
+
+    def _fit_epoch_per_sample(self, x, y):
+        # One pass over the dataset with the original per-sample learning rule.
+        # Returns the number of samples that caused a weight update.
+        n_updates = 0
+        for input_x, target_y in zip(x, y):
+            # Make a prediction for the current input
+            prediction = self.predict(input_x)
+            # Calculate the error as the difference between the target and prediction
+            error = target_y - prediction
+            # A correct prediction leaves the weights unchanged (the update would add zero),
+            # so there is nothing to do
+            if error == 0:
+                continue
+            n_updates += 1
+            # Update the weights (excluding the bias) using the perceptron learning rule
+            # The rule is: w = w + learning_rate * error * input
+            # This adjusts the weights in the direction that reduces the error between the
+            # predicted and target outputs.
+            # 
+            # Mathematically, if the input vector is x = [x1, x2, ..., xn] and the weights
+            # are w = [w1, w2, ..., wn], the update for each weight wi is:
+            # wi = wi + learning_rate * (target_y - prediction) * xi
+            #
+            # Example:
+            # Suppose we have a single input feature x = [2] and the target output is 1.
+            # If the prediction is 0, the error is 1 (1 - 0).
+            # With a learning rate of 0.1, the weight update would be:
+            # w1 = w1 + 0.1 * 1 * 2 = w1 + 0.2
+            # This increases the weight, making the perceptron more likely to predict 1
+            # for this input in the future.
+            self.weights[1:] += self.learning_rate * error * input_x
+            # Update the bias term separately using the same learning rule
+            # The bias weight is updated to adjust the decision boundary independently of the input features.
+            # The update rule is: bias_weight = bias_weight + learning_rate * error
+            # This allows the perceptron to shift the decision boundary up or down.
+            #
+            # Example:
+            # Continuing from the previous example, if the error is 1 and the learning rate is 0.1,
+            # the bias weight update would be:
+            # bias_weight = bias_weight + 0.1 * 1 = bias_weight + 0.1
+            # This adjustment helps the perceptron to better fit the training data by shifting
+            # the decision boundary.
+            self.weights[0] += self.learning_rate * error  # Update bias
+        return n_updates
+
+    def _fit_epoch_per_sample_sparse(self, x, y):
+        # The per-sample learning rule for a CSR matrix x. Row i stores its non-zero values in
+        # x.data[x.indptr[i]:x.indptr[i + 1]] and their columns in x.indices[...] at the same positions.
+        # Both the prediction and the update only touch the weights of those columns:
+        #     w[columns] += learning_rate * error * values
+        # since every other input is 0 and would leave its weight unchanged. An epoch therefore costs
+        # O(nnz) instead of O(n_samples * n_features), which matters with millions of (hashed) features.
+        n_updates = 0
+        feature_weights = self.weights[1:]  # A view: updating it updates self.weights
+        for i, target_y in enumerate(y):
+            row = slice(x.indptr[i], x.indptr[i + 1])
+            columns, values = x.indices[row], x.data[row]
+            prediction = 1 if values @ feature_weights[columns] + self.weights[0] >= 0 else 0
+            error = target_y - prediction
+            if error == 0:
+                continue
+            n_updates += 1
+            feature_weights[columns] += self.learning_rate * error * values
+            self.weights[0] += self.learning_rate * error
+        return n_updates
+
+    def _fit_epoch_mini_batch(self, x, y, batch_size=None):
+        # One pass over the dataset, updating the weights once per batch.
+        # For a batch X_b with targets y_b, the errors of all samples are computed at once:
+        #     errors = y_b - predict_batch(X_b)
+        # and the per-sample updates are summed, which is a single matrix-vector product:
+        #     w[1:] += learning_rate * errors @ X_b
+        #     w[0]  += learning_rate * sum(errors)
+        #
+        # Example:
+        # With the batch X_b = [[1, 0], [0, 1]], y_b = [1, 0] and predictions [0, 1], the errors are
+        # [1, -1] and the weights move by learning_rate * [1, -1]: towards the first sample and away
+        # from the second, the same as two per-sample updates made with the weights of the start of
+        # the batch.
+        # Returns the number of misclassified samples (0 means the epoch changed nothing).
+        n_samples = x.shape[0]
+        batch_size = batch_size or max(n_samples, 1)
+        n_updates = 0
+        for start in range(0, n_samples, batch_size):
+            X_batch = x[start:start + batch_size] if sparse.issparse(x) else np.asarray(x[start:start + batch_size])
+            # Float errors: with integer X (e.g. uint8 pixels), `errors @ X_batch` would otherwise be
+            # computed in a narrow integer type and silently overflow
+            errors = np.asarray(y[start:start + batch_size]).astype(self.weights.dtype) - self.predict_batch(X_batch)
+            n_errors = np.count_nonzero(errors)
+            if n_errors == 0:
+                continue
+            n_updates += n_errors
+            if sparse.issparse(X_batch):
+                # errors @ X_batch as a sparse 1-row product: it only has entries for the columns that
+                # are non-zero in the batch, so only those weights are updated
+                update = sparse.csr_matrix(errors.reshape(1, -1)) @ X_batch
+                self.weights[1:][update.indices] += self.learning_rate * update.data
+            else:
+                self.weights[1:] += self.learning_rate * (errors @ X_batch)
+            self.weights[0] += self.learning_rate * errors.sum()
+        return n_updates
+
+
+class OneVsRestPerceptron:
+    """
+    A multi-class perceptron using the one-vs-rest (OvR) strategy.
+
+    For every class k, a binary perceptron learns to answer "is this sample of class k?". Instead of
+    keeping one `Perceptron` object per class, all of them are stored as the rows of a single weight
+    matrix of shape (n_classes, n_features + 1), column 0 holding the biases. The scores of every
+    class are then one matrix product, for a single sample as well as for a whole batch, and the
+    predicted class is the one with the highest score.
+
+    Training applies the perceptron learning rule of `Perceptron` to every class at once. It can also
+    train the per-class binary problems in parallel worker processes (`n_jobs`).
+    """
+    def __init__(self, input_size, learning_rate=0.01, epochs=1000):
+        self.input_size = input_size
+        self.learning_rate = learning_rate
+        self.epochs = epochs
+        self.classes_ = None  # Sorted class labels, set by `fit`
+        self.weights = None  # (n_classes, input_size + 1) weight matrix, set by `fit`
+
+    def decision_function(self, X):
+        # Scores of every class for every row of X (or of a single sample x), one matrix product:
+        # X @ W[:, 1:].T + W[:, 0], i.e. the linear output of every per-class perceptron.
+        #
+        # Example:
+        # With two features and the weight matrix
+        #     W = [[ 1, -1,  0],    (class 0: bias 1, weights -1, 0)
+        #          [-1,  1,  0]]    (class 1: bias -1, weights 1, 0)
+        # the sample (2, 5) gets the scores [1 - 2, -1 + 2] = [-1, 1].
+        #
+        # For a sparse X the product is a sparse-dense product that only visits the non-zeros of X.
+        return X @ self.weights[:, 1:].T + self.weights[:, 0]
+
+    def predict(self, X):
+        # The predicted class is the one whose perceptron is most confident. Works for a single sample
+        # (returns one label) as well as for a 2D batch (returns one label per row).
+        return self.classes_[np.argmax(self.decision_function(X), axis=-1)]
+
+    def fit(self, x, y, mode="per_sample", batch_size=None, early_stopping=True, n_jobs=None):
+        # Train all the per-class perceptrons on the dataset (x: inputs, y: class labels).
+        # Class k is trained on the binary targets (y == k): 1 for samples of class k, 0 for all others.
+        #
+        # `mode`, `batch_size` and `early_stopping` work like in `Perceptron.fit`. With the default
+        # `n_jobs=None`, all the classes are updated together: one matrix-vector product per sample
+        # (or one matrix product per batch) gives the errors of every class at once. With `n_jobs` > 1,
+        # every class is instead trained as its own `Perceptron` in a pool of `n_jobs` processes.
+        x = _as_csr(x) if sparse.issparse(x) else np.asarray(x)
+        self.classes_, y_indices = np.unique(y, return_inverse=True)
+        # One column of binary targets per class: targets[i, k] is 1 if sample i is of class k
+        targets = np.zeros((len(y_indices), len(self.classes_)), dtype=np.int8)
+        targets[np.arange(len(y_indices)), y_indices] = 1
+
+        if n_jobs is not None and n_jobs > 1:
+            return self._fit_parallel(x, targets, mode, batch_size, early_stopping, n_jobs)
+
+        self.weights = np.zeros((len(self.classes_), self.input_size + 1))
+        self.n_epochs_ = 0
         for _ in range(self.epochs):
-            for input_x, target_y in zip(x, y):
-                # Make a prediction for the current input
-                prediction = self.predict(input_x)
-                # Calculate the error as the difference between the target and prediction
-                error = target_y - prediction
-                # Update the weights (excluding the bias) using the perceptron learning rule
-                # The rule is: w = w + learning_rate * error * input
-                # This adjusts the weights in the direction that reduces the error between the
-                # predicted and target outputs.
-                # 
-                # Mathematically, if the input vector is x = [x1, x2, ..., xn] and the weights
-                # are w = [w1, w2, ..., wn], the update for each weight wi is:
-                # wi = wi + learning_rate * (target_y - prediction) * xi
-                #
-                # Example:
-                # Suppose we have a single input feature x = [2] and the target output is 1.
-                # If the prediction is 0, the error is 1 (1 - 0).
-                # With a learning rate of 0.1, the weight update would be:
-                # w1 = w1 + 0.1 * 1 * 2 = w1 + 0.2
-                # This increases the weight, making the perceptron more likely to predict 1
-                # for this input in the future.
-                self.weights[1:] += self.learning_rate * error * input_x
-                # Update the bias term separately using the same learning rule
-                # The bias weight is updated to adjust the decision boundary independently of the input features.
-                # The update rule is: bias_weight = bias_weight + learning_rate * error
-                # This allows the perceptron to shift the decision boundary up or down.
-                #
-                # Example:
-                # Continuing from the previous example, if the error is 1 and the learning rate is 0.1,
-                # the bias weight update would be:
-                # bias_weight = bias_weight + 0.1 * 1 = bias_weight + 0.1
-                # This adjustment helps the perceptron to better fit the training data by shifting
-                # the decision boundary.
-                self.weights[0] += self.learning_rate * error  # Update bias
+            self.n_epochs_ += 1
+            if mode == "per_sample":
+                n_updates = self._fit_epoch_per_sample(x, targets)
+            elif mode == "mini_batch":
+                n_updates = self._fit_epoch_mini_batch(x, targets, batch_size)
+            else:
+                raise ValueError(f"mode must be 'per_sample' or 'mini_batch', got {mode!r}")
+            # The epoch changed no class's weights: every later epoch would be the same
+            if early_stopping and n_updates == 0:
+                break
+        return self
+
+    def _fit_epoch_per_sample(self, x, targets):
+        # The perceptron learning rule of `Perceptron`, applied to every class at once. For one sample x:
+        #     errors = targets - (W[:, 1:] @ x + W[:, 0] >= 0)    (one error per class, -1, 0 or 1)
+        #     W[:, 1:] += learning_rate * outer(errors, x)
+        #     W[:, 0]  += learning_rate * errors
+        # Classes that predicted the sample correctly have an error of 0, so their weights do not move.
+        if sparse.issparse(x):
+            return self._fit_epoch_per_sample_sparse(x, targets)
+        n_updates = 0
+        for input_x, target in zip(x, targets):
+            predictions = self.weights[:, 1:] @ input_x + self.weights[:, 0] >= 0
+            # As floats, so the update below never overflows in a narrow integer type of `targets` or x
+            errors = target.astype(self.weights.dtype) - predictions
+            if not errors.any():
+                continue
+            n_updates += 1
+            self.weights[:, 1:] += self.learning_rate * np.outer(errors, input_x)
+            self.weights[:, 0] += self.learning_rate * errors
+        return n_updates
+
+    def _fit_epoch_per_sample_sparse(self, x, targets):
+        # Like `Perceptron._fit_epoch_per_sample_sparse`: only the weight columns of the non-zero
+        # features of a sample are read and updated, for every class at once.
+        n_updates = 0
+        feature_weights = self.weights[:, 1:]  # A view: updating it updates self.weights
+        for i, target in enumerate(targets):
+            row = slice(x.indptr[i], x.indptr[i + 1])
+            columns, values = x.indices[row], x.data[row]
+            errors = target.astype(self.weights.dtype) - (feature_weights[:, columns] @ values + self.weights[:, 0] >= 0)
+            if not errors.any():
+                continue
+            n_updates += 1
+            feature_weights[:, columns] += self.learning_rate * np.outer(errors, values)
+            self.weights[:, 0] += self.learning_rate * errors
+        return n_updates
+
+    def _fit_epoch_mini_batch(self, x, targets, batch_size=None):
+        # Like `Perceptron._fit_epoch_mini_batch`, for every class at once: with the (batch, n_classes)
+        # matrix of errors E, the summed updates of the batch are W[:, 1:] += learning_rate * E.T @ X_b.
+        n_samples = x.shape[0]
+        batch_size = batch_size or max(n_samples, 1)
+        n_updates = 0
+        for start in range(0, n_samples, batch_size):
+            X_batch = x[start:start + batch_size]
+            # `targets` is int8 to keep it small; the errors are floats so `E.T @ X_b` cannot overflow
+            errors = targets[start:start + batch_size].astype(self.weights.dtype) - (self.decision_function(X_batch) >= 0)
+            n_errors = np.count_nonzero(errors)
+            if n_errors == 0:
+                continue
+            n_updates += n_errors
+            if sparse.issparse(X_batch):
+                # E.T @ X_b as a sparse product: only the columns that are non-zero in the batch get an update
+                update = (sparse.csr_matrix(errors.T) @ X_batch).tocoo()
+                self.weights[:, 1:][update.row, update.col] += self.learning_rate * update.data
+            else:
+                self.weights[:, 1:] += self.learning_rate * (errors.T @ X_batch)
+            self.weights[:, 0] += self.learning_rate * errors.sum(axis=0)
+        return n_updates
+
+    def _fit_parallel(self, x, targets, mode, batch_size, early_stopping, n_jobs):
+        # Train one binary `Perceptron` per class in a process pool. The inputs are sent to every worker
+        # once, through the pool initializer, instead of once per class; every task only carries the
+        # binary targets of its class.
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_ovr_worker, initargs=(x,)) as executor:
+            results = list(
+                executor.map(
+                    _fit_binary,
+                    [targets[:, k] for k in range(len(self.classes_))],
+                    itertools.repeat((self.learning_rate, self.epochs, mode, batch_size, early_stopping)),
+                )
+            )
+        self.weights = np.vstack([weights for weights, _ in results])
+        # Classes converge independently; report the slowest one
+        self.n_epochs_ = max(n_epochs for _, n_epochs in results)
+        return self
+
+
+# Training inputs of a worker process of `OneVsRestPerceptron._fit_parallel`, set once per worker
+_ovr_x = None
+
+
+def _init_ovr_worker(x):
+    global _ovr_x
+    _ovr_x = x
+
+
+def _fit_binary(y_binary, params):
+    learning_rate, epochs, mode, batch_size, early_stopping = params
+    perceptron = Perceptron(_ovr_x.shape[1], learning_rate, epochs)
+    perceptron.fit(_ovr_x, y_binary, mode, batch_size, early_stopping)
+    return perceptron.weights, perceptron.n_epochs_
+
+
+def iter_csv_chunks(path, target_column, chunksize=100_000, feature_columns=None):
+    # Lazily read a large CSV file as (x_chunk, y_chunk) pairs of `chunksize` rows, for `fit_chunks`.
+    # pandas only parses one chunk at a time, so the file is never fully loaded into memory.
+    import pandas as pd
+
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        x_chunk = chunk[feature_columns] if feature_columns is not None else chunk.drop(columns=target_column)
+        yield x_chunk.to_numpy(dtype=np.float64), chunk[target_column].to_numpy()
 
 
 if __name__ == "__main__":
@@ -128,6 +531,8 @@ if __name__ == "__main__":
 
     perceptron = Perceptron(input_size = 2)
     perceptron.fit(x, y)
+    # Training stops as soon as an epoch makes no update, long before `epochs` is reached
+    print(f"Converged after {perceptron.n_epochs_} of {perceptron.epochs} epochs")
 
     # Fucntion to perform and time the prediction
     def time_prediction():
@@ -140,3 +545,6 @@ if __name__ == "__main__":
     execution_time = timeit.timeit(time_prediction, number=1)
     print(f"Time taken for prediction: {execution_time} seconds")
 
+    # Predict every input of the dataset in one vectorised call instead of one `predict` call per row
+    print(f"Batch predictions for {x.tolist()}: {perceptron.predict_batch(x)}")
+